@@ -1,31 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from schemas.auth import AdminLoginRequest, AdminLoginResponse
-from crud.admin import get_admin
-from core.security import verify_password, create_access_token
-from database.session import SessionLocal
+from schemas.auth import (
+    AdminLoginRequest,
+    AdminLoginResponse,
+    ScannerTokenRequest,
+    ScannerTokenResponse,
+)
+from crud.admin import admin_cache, get_admin_password_hash
+from crud.token_revocation import revoke_token, revoke_device
+from core.config import (
+    SCANNER_TOKEN_MINUTES,
+    LOGIN_RATE_PER_MINUTE,
+    LOGIN_BURST,
+    LOGIN_BACKOFF_BASE,
+    LOGIN_BACKOFF_MAX,
+)
+from core.rate_limit import TokenBucketLimiter, FailureBackoff, client_ip
+from core.security import verify_password_async, create_access_token
+from core.dependencies import super_admin_required, revocations
+from database.session import SessionLocal, get_db
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
 
-def get_db():
+login_limiter = TokenBucketLimiter(rate=LOGIN_RATE_PER_MINUTE / 60, capacity=LOGIN_BURST)
+login_backoff = FailureBackoff(base=LOGIN_BACKOFF_BASE, max_delay=LOGIN_BACKOFF_MAX)
+
+
+def _too_many_attempts(retry_after: float):
+    raise HTTPException(
+        status_code=429,
+        detail="Too many login attempts",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
+def _load_password_hash():
     db = SessionLocal()
     try:
-        yield db
+        return get_admin_password_hash(db)
     finally:
         db.close()
 
 
 @router.post("/login", response_model=AdminLoginResponse)
-def admin_login(payload: AdminLoginRequest, db: Session = Depends(get_db)):
-    admin = get_admin(db)
+async def admin_login(payload: AdminLoginRequest, request: Request):
+    ip = client_ip(request)
 
-    if not admin or not verify_password(payload.password, admin.password_hash):
+    # Rejected before any hashing, so bursts cost almost nothing
+    locked_for = login_backoff.locked_for(ip)
+    if locked_for:
+        _too_many_attempts(locked_for)
+
+    wait = login_limiter.acquire(ip)
+    if wait:
+        _too_many_attempts(wait)
+
+    password_hash = admin_cache.get("password_hash")
+    if password_hash is None:
+        password_hash = await run_in_threadpool(_load_password_hash)
+
+    if not password_hash or not await verify_password_async(payload.password, password_hash):
+        login_backoff.failure(ip)
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    login_backoff.success(ip)
     token = create_access_token()
     return {
         "token": token,
         "session_expiry": "2 hours"
     }
+
+
+# -----------------------------
+# Logout (revokes the current token)
+# -----------------------------
+@router.post("/logout")
+def admin_logout(
+    claims: dict = Depends(super_admin_required),
+    db: Session = Depends(get_db),
+):
+    expires_at = datetime.fromtimestamp(claims["exp"], tz=timezone.utc)
+    if claims.get("jti"):
+        revoke_token(db, claims["jti"], expires_at)
+        revocations.add_token(claims["jti"])
+    return {"message": "Logged out"}
+
+
+# -----------------------------
+# Scanner device tokens (ADMIN ONLY)
+# -----------------------------
+@router.post("/scanner-tokens", response_model=ScannerTokenResponse)
+def issue_scanner_token(
+    payload: ScannerTokenRequest,
+    _: dict = Depends(super_admin_required),
+):
+    """
+    Short-lived token for one gate device. It can only call the scan
+    endpoints and can be cut off with POST /api/auth/devices/{id}/revoke.
+    """
+    minutes = payload.expires_minutes or SCANNER_TOKEN_MINUTES
+    token = create_access_token(
+        subject="scanner", expires_minutes=minutes, device_id=payload.device_id
+    )
+    return {
+        "token": token,
+        "deviceId": payload.device_id,
+        "expiresAt": datetime.now(timezone.utc) + timedelta(minutes=minutes),
+    }
+
+
+@router.post("/devices/{device_id}/revoke")
+def revoke_scanner_device(
+    device_id: str,
+    db: Session = Depends(get_db),
+    _: dict = Depends(super_admin_required),
+):
+    """
+    Invalidates every token issued to the device so far
+    (token `iat` has one-second resolution, so re-issue after a second).
+    """
+    # Long enough to outlive any token the device could hold
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=24 * 60)
+    revoked_at = revoke_device(db, device_id, expires_at)
+    revocations.add_device(device_id, revoked_at.timestamp())
+    return {"message": "Device revoked"}
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+
+from schemas.event import (
+    EventCreateRequest,
+    EventUpdateRequest,
+    EventResponse,
+    CurrentEventResponse,
+    EventArchiveResponse,
+)
+from crud.event import (
+    get_event,
+    get_event_settings,
+    list_events,
+    create_event,
+    update_event,
+    archive_event,
+)
+from crud.capacity import get_seats_remaining
+from core.config import CURRENT_EVENT
+from core.dependencies import super_admin_required
+from database.session import get_db
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+
+def _event_or_404(db: Session, event_id: str):
+    event = get_event(db, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
+
+# -----------------------------
+# Current event (PUBLIC)
+# -----------------------------
+@router.get("/current", response_model=CurrentEventResponse)
+def fetch_current_event(
+    db: Session = Depends(get_db),
+):
+    """
+    The event this deployment sells tickets for (CURRENT_EVENT).
+    """
+    event = get_event_settings(db)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    return {
+        "id": event.id,
+        "name": event.name,
+        "price": event.price,
+        "is_open": event.is_open,
+        "seats_remaining": get_seats_remaining(db),
+    }
+
+
+# -----------------------------
+# Manage events (ADMIN ONLY)
+# -----------------------------
+@router.get("", response_model=List[EventResponse])
+def fetch_events(
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    return list_events(db)
+
+
+@router.post("", response_model=EventResponse)
+def add_event(
+    payload: EventCreateRequest,
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    """
+    Creates an event (plus its ticket partition when tickets are
+    partitioned). Point CURRENT_EVENT at it to start selling.
+    """
+    if get_event(db, payload.id):
+        raise HTTPException(status_code=409, detail="Event already exists")
+
+    event = create_event(db, payload.model_dump())
+    db.commit()
+    return event
+
+
+@router.patch("/{event_id}", response_model=EventResponse)
+def edit_event(
+    event_id: str,
+    payload: EventUpdateRequest,
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    """
+    Changes price, capacity or name, or opens / closes sales.
+    Other API processes pick changes up within EVENT_CACHE_TTL; the
+    capacity check on every sale reads the events row directly.
+    """
+    event = _event_or_404(db, event_id)
+    if event.archived_at:
+        raise HTTPException(status_code=409, detail="Event is archived")
+
+    update_event(db, event, payload.model_dump(exclude_unset=True))
+    db.commit()
+    return event
+
+
+@router.post("/{event_id}/archive", response_model=EventArchiveResponse)
+def archive(
+    event_id: str,
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    """
+    Closes a finished event. With partitioned tickets its partition is
+    detached in one statement and left as a standalone table.
+    """
+    if event_id == CURRENT_EVENT:
+        raise HTTPException(status_code=400, detail="Cannot archive the current event")
+
+    event = _event_or_404(db, event_id)
+    if event.archived_at:
+        raise HTTPException(status_code=409, detail="Event is already archived")
+
+    detached = archive_event(db, event)
+    db.commit()
+    return {"message": "Event archived", "detached_table": detached}
@@ -1,51 +1,361 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional
 
-from schemas.scan import ScanRequest, ScanResponse
-from crud.ticket import get_ticket_by_id, mark_ticket_checked_in
-from core.crypto import decrypt_qr_payload
-from core.dependencies import super_admin_required
-from database.session import SessionLocal
+from schemas.scan import (
+    ScanRequest,
+    ScanResponse,
+    TicketManifestResponse,
+    CheckInSyncRequest,
+    CheckInSyncResponse,
+    FeedTokenResponse,
+)
+from crud.ticket import (
+    get_ticket_by_id,
+    mark_ticket_checked_in,
+    get_ticket_manifest,
+    get_existing_ticket_ids,
+    check_in_tickets,
+    get_ticket_stats,
+    stats_cache,
+)
+from crud import ticket_async
+from core.config import FEED_QUEUE_SIZE, FEED_STATS_INTERVAL, FEED_TOKEN_MINUTES, DB_ASYNC, CURRENT_EVENT
+from core.crypto import decrypt_qr_payload, qr_digest, sign_manifest
+from core.dependencies import scanner_required, super_admin_required, feed_query_token
+from core.security import create_access_token
+from core.events import EventBroker
+from database.session import SessionLocal, get_db, get_async_db
+from workers.scan_index import scan_index
 
 router = APIRouter(prefix="/api/scan", tags=["Scan"])
 
+# Live check-in events for door staff / organiser screens
+checkin_feed = EventBroker(queue_size=FEED_QUEUE_SIZE)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+MANIFEST_VERSION = 1
 
 
-@router.post("", response_model=ScanResponse)
-def scan_ticket(
-    payload: ScanRequest,
-    db: Session = Depends(get_db),
-    _: str = Depends(super_admin_required)
-):
+# -----------------------------
+# Gate scan
+# -----------------------------
+def _ticket_id_from_qr(qr_data: str) -> str:
     try:
-        ticket_id = decrypt_qr_payload(payload.qr_data)
+        return decrypt_qr_payload(qr_data)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid QR code")
 
-    ticket = get_ticket_by_id(db, ticket_id)
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
 
-    if ticket.is_checked_in:
-        return {
-            "ticketId": ticket.id,
-            "fullName": ticket.full_name,
-            "checkedIn": True,
-            "message": "Ticket already used"
-        }
+def _check_in_succeeded(ticket, gate_id) -> dict:
+    checkin_feed.publish({
+        "type": "check_in",
+        "ticketId": ticket.id,
+        "fullName": ticket.full_name,
+        "gateId": gate_id,
+        "at": ticket.checked_in_at,
+    })
+    return {
+        "ticketId": ticket.id,
+        "fullName": ticket.full_name,
+        "checkedIn": True,
+        "checkedInAt": ticket.checked_in_at,
+        "checkedInBy": gate_id,
+        "message": "Check-in successful"
+    }
+
 
-    ticket = mark_ticket_checked_in(db, ticket)
+def _check_in_rejected(ticket, gate_id) -> dict:
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
 
+    checkin_feed.publish({
+        "type": "duplicate",
+        "ticketId": ticket.id,
+        "fullName": ticket.full_name,
+        "gateId": gate_id,
+        "firstCheckedInAt": ticket.checked_in_at,
+        "firstCheckedInBy": ticket.checked_in_by,
+    })
     return {
         "ticketId": ticket.id,
         "fullName": ticket.full_name,
         "checkedIn": True,
-        "message": "Check-in successful"
+        "checkedInAt": ticket.checked_in_at,
+        "checkedInBy": ticket.checked_in_by,
+        "message": "Ticket already used"
+    }
+
+
+def _scan_from_index(ticket_id: str, gate_id) -> Optional[dict]:
+    """
+    Event mode: answers the scan from memory. None when event mode is
+    off or the ticket is not indexed, so the caller asks the database.
+    """
+    if not scan_index.active:
+        return None
+    record, checked_in_now = scan_index.check_in(ticket_id, gate_id)
+    if record is None:
+        return None
+    if checked_in_now:
+        return _check_in_succeeded(record, gate_id)
+    return _check_in_rejected(record, gate_id)
+
+
+def scan_ticket(
+    payload: ScanRequest,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(scanner_required)
+):
+    # Scanner tokens are bound to a device; that id wins over the payload
+    gate_id = claims.get("device") or payload.gate_id
+    ticket_id = _ticket_id_from_qr(payload.qr_data)
+
+    indexed = _scan_from_index(ticket_id, gate_id)
+    if indexed:
+        return indexed
+
+    ticket = mark_ticket_checked_in(db, ticket_id, gate_id)
+    if ticket:
+        scan_index.remember(ticket.id, ticket.full_name, ticket.checked_in_at, gate_id)
+        return _check_in_succeeded(ticket, gate_id)
+
+    # Slow path: only rejected scans pay for a second lookup
+    return _check_in_rejected(get_ticket_by_id(db, ticket_id, CURRENT_EVENT), gate_id)
+
+
+async def scan_ticket_async(
+    payload: ScanRequest,
+    db: AsyncSession = Depends(get_async_db),
+    claims: dict = Depends(scanner_required)
+):
+    gate_id = claims.get("device") or payload.gate_id
+    ticket_id = _ticket_id_from_qr(payload.qr_data)
+
+    indexed = _scan_from_index(ticket_id, gate_id)
+    if indexed:
+        return indexed
+
+    ticket = await ticket_async.mark_ticket_checked_in(db, ticket_id, gate_id)
+    if ticket:
+        scan_index.remember(ticket.id, ticket.full_name, ticket.checked_in_at, gate_id)
+        return _check_in_succeeded(ticket, gate_id)
+
+    return _check_in_rejected(await ticket_async.get_ticket_by_id(db, ticket_id, CURRENT_EVENT), gate_id)
+
+
+router.post("", response_model=ScanResponse)(scan_ticket_async if DB_ASYNC else scan_ticket)
+
+
+# -----------------------------
+# Offline manifest (ADMIN / SCANNER)
+# -----------------------------
+@router.get("/manifest", response_model=TicketManifestResponse)
+def export_manifest(
+    db: Session = Depends(get_db),
+    _: dict = Depends(scanner_required),
+):
+    """
+    Signed snapshot of every ticket for scanners that validate locally.
+    Scanners hash the scanned QR string (sha256, first 16 hex chars)
+    and look it up in `tickets`; `signature` is HMAC-SHA256 over the
+    canonical JSON of the other fields.
+    """
+    rows = get_ticket_manifest(db)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generatedAt": int(time.time()),
+        "count": len(rows),
+        "fields": ["ticketId", "qrDigest", "checkedIn"],
+        "tickets": [
+            [row.id, qr_digest(row.qr_data) if row.qr_data else None, int(bool(row.is_checked_in))]
+            for row in rows
+        ],
+    }
+    manifest["signature"] = sign_manifest(manifest)
+    return manifest
+
+
+# -----------------------------
+# Offline check-in sync (ADMIN / SCANNER)
+# -----------------------------
+@router.post("/sync", response_model=CheckInSyncResponse)
+def sync_check_ins(
+    payload: CheckInSyncRequest,
+    db: Session = Depends(get_db),
+    claims: dict = Depends(scanner_required),
+):
+    """
+    Applies check-ins recorded offline by a scanner in one transaction.
+
+    Conflicts are resolved first-scan-wins:
+    - repeated scans of a ticket within the batch -> "duplicate"
+    - ticket already checked in on the server (e.g. another gate) -> "already_used"
+    """
+    device_id = claims.get("device") or payload.device_id
+
+    results = {}
+    duplicates = []
+
+    for item in sorted(payload.check_ins, key=lambda c: c.scanned_at):
+        if item.ticket_id in results:
+            duplicates.append(item)
+            continue
+        results[item.ticket_id] = {
+            "ticketId": item.ticket_id,
+            "status": None,
+            "scannedAt": item.scanned_at,
+        }
+
+    # Event mode: indexed tickets are decided in memory, the rest in the DB
+    applied = set()
+    in_memory = {}
+    if scan_index.active:
+        for tid, result in results.items():
+            record, checked_in_now = scan_index.check_in(tid, device_id, result["scannedAt"])
+            if record is not None:
+                in_memory[tid] = checked_in_now
+        applied = {tid for tid, checked_in_now in in_memory.items() if checked_in_now}
+
+    applied |= check_in_tickets(
+        db,
+        {tid: result["scannedAt"] for tid, result in results.items() if tid not in in_memory},
+        device_id,
+    )
+    pending = [tid for tid in results if tid not in applied]
+    existing = get_existing_ticket_ids(db, [tid for tid in pending if tid not in in_memory])
+    existing |= set(in_memory)
+    db.commit()
+    if applied:
+        stats_cache.clear()
+
+    for ticket_id, result in results.items():
+        if ticket_id in applied:
+            result["status"] = "checked_in"
+        elif ticket_id in existing:
+            result["status"] = "already_used"
+        else:
+            result["status"] = "not_found"
+
+    if applied:
+        checkin_feed.publish({
+            "type": "sync",
+            "deviceId": device_id,
+            "applied": len(applied),
+        })
+
+    return {
+        "applied": len(applied),
+        "results": list(results.values()) + [
+            {"ticketId": d.ticket_id, "status": "duplicate", "scannedAt": d.scanned_at}
+            for d in duplicates
+        ],
     }
+
+
+# -----------------------------
+# Live check-in feed (ADMIN / SCANNER, Server-Sent Events)
+# -----------------------------
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _counters() -> dict:
+    db = SessionLocal()
+    try:
+        stats = get_ticket_stats(db)
+        return {"sold": stats["sold"], "checkedIn": stats["checked_in"]}
+    finally:
+        db.close()
+
+
+async def _feed_events(request: Request):
+    subscription = checkin_feed.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        next_counters = 0.0
+
+        while not await request.is_disconnected():
+            now = time.monotonic()
+            if now >= next_counters:
+                yield _sse("counters", await run_in_threadpool(_counters))
+                next_counters = now + FEED_STATS_INTERVAL
+
+            try:
+                event = await subscription.get(timeout=next_counters - now)
+            except asyncio.TimeoutError:
+                continue
+
+            if event is None:
+                # Too slow to keep up; the client reconnects and resyncs
+                return
+            yield _sse(event["type"], event)
+    finally:
+        checkin_feed.unsubscribe(subscription)
+
+
+@router.post("/feed/token", response_model=FeedTokenResponse)
+def issue_feed_token(claims: dict = Depends(scanner_required)):
+    """
+    FEED_TOKEN_MINUTES token that can only open GET /feed. Keeps the
+    session token out of query strings (access logs, proxies).
+    """
+    token = create_access_token(
+        subject="feed", expires_minutes=FEED_TOKEN_MINUTES, device_id=claims.get("device")
+    )
+    return {
+        "token": token,
+        "expiresAt": datetime.now(timezone.utc) + timedelta(minutes=FEED_TOKEN_MINUTES),
+    }
+
+
+@router.get("/feed")
+async def checkin_feed_stream(
+    request: Request,
+    _: str = Depends(feed_query_token),
+):
+    """
+    Server-Sent Events stream of check-ins and duplicate scans, plus
+    `counters` events every FEED_STATS_INTERVAL seconds.
+    Pass a token from POST /feed/token as `?token=` (EventSource cannot
+    set headers); it is checked when the stream opens.
+    """
+    return StreamingResponse(
+        _feed_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -----------------------------
+# Event mode (ADMIN ONLY)
+# -----------------------------
+@router.get("/event-mode")
+def event_mode_status(_: dict = Depends(super_admin_required)):
+    return scan_index.status()
+
+
+@router.post("/event-mode")
+def enable_event_mode(_: dict = Depends(super_admin_required)):
+    """
+    (Re)loads every ticket into memory; scans are then answered from
+    the index and check-ins written to the database in batches.
+    """
+    scan_index.start()
+    return scan_index.status()
+
+
+@router.delete("/event-mode")
+def disable_event_mode(_: dict = Depends(super_admin_required)):
+    """
+    Flushes pending check-ins and returns scans to the database path.
+    """
+    scan_index.stop()
+    return scan_index.status()
@@ -1,7 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from decimal import Decimal
+from typing import List, Optional
 
 
 from schemas.ticket import (
@@ -9,34 +21,127 @@ from schemas.ticket import (
     AdminTicketCreateRequest as TicketCreateRequest,
     TicketAvailabilityRequest,
     TicketAvailabilityResponse,
+    TicketSummaryResponse,
+    TicketStatsResponse,
+    SeatHoldRequest,
+    SeatHoldResponse,
+    TicketImportResponse,
 )
 from crud.ticket import (
-    create_ticket,
+    create_tickets_bulk,
     get_all_tickets,
+    list_tickets,
+    iter_tickets,
+    get_ticket_stats,
     get_ticket_by_id,
-    get_ticket_by_email,
-    get_ticket_by_phone,
+    find_contact_conflict,
     get_tickets_by_original_tx_ref,
-    transaction_already_processed,
     delete_ticket,
+    order_cache,
+    stats_cache,
+)
+from crud import ticket_async
+from crud.order import create_order_if_new
+from crud.capacity import (
+    place_seat_hold,
+    cancel_seat_hold,
+    convert_seat_hold,
+    get_hold_events,
+    release_seats,
+    get_seats_remaining,
+    get_seats_remaining_async,
+)
+from crud.event import get_event_settings, get_event_settings_async
+from core.cache import TTLCache
+from core.rate_limit import TokenBucketLimiter, client_ip
+from core.config import (
+    DB_ASYNC,
+    SEAT_HOLD_MINUTES,
+    MAX_SEATS_PER_HOLD,
+    MAX_OPEN_HOLDS_PER_CLIENT,
+    HOLD_RATE_PER_MINUTE,
+    HOLD_BURST,
+    QR_IMAGE_SCALE,
+    QR_IMAGE_CACHE_SIZE,
+    ORDER_NOT_FOUND_TTL,
+    PDF_WORKERS,
+    IMPORT_WORKERS,
+    IMPORT_CHUNK_SIZE,
+    CURRENT_EVENT,
 )
 from core.dependencies import super_admin_required
-from core.crypto import encrypt_qr_payload
-from utils.id_generator import generate_ticket_id
-from database.session import SessionLocal
+from utils.id_generator import issue_ticket_ids
+from utils.qr_render import render_qr_png, render_qr_svg, render_tickets_pdf
+from database.session import SessionLocal, get_db
+from database.replica import run_read, run_read_async, note_write
+from workers.ticket_import import import_orders, order_ticket_rows, unpriced_attendee
+from workers.scan_index import scan_index
+
+from models.ticket import Ticket
 
 router = APIRouter(prefix="/api/tickets", tags=["Tickets"])
 
+SUMMARY_COLUMNS = [
+    Ticket.id,
+    Ticket.full_name,
+    Ticket.department,
+    Ticket.level,
+    Ticket.gender,
+    Ticket.payment_status,
+    Ticket.is_checked_in,
+    Ticket.purchase_date,
+]
+
+EXPORT_COLUMNS = [
+    Ticket.id,
+    Ticket.original_tx_ref,
+    Ticket.full_name,
+    Ticket.email,
+    Ticket.phone,
+    Ticket.department,
+    Ticket.level,
+    Ticket.gender,
+    Ticket.price,
+    Ticket.currency,
+    Ticket.payment_status,
+    Ticket.is_checked_in,
+    Ticket.checked_in_at,
+    Ticket.purchase_date,
+]
+
+
 
 # -----------------------------
-# Database dependency
+# Listing filters (query params)
 # -----------------------------
-def get_db():
-    db = SessionLocal()
+def ticket_filters(
+    event_id: Optional[str] = None,
+    department: Optional[str] = None,
+    level: Optional[str] = None,
+    gender: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    checked_in: Optional[bool] = None,
+) -> dict:
+    return {
+        "event_id": event_id,  # default: CURRENT_EVENT
+        "department": department,
+        "level": level,
+        "gender": gender,
+        "payment_status": payment_status,
+        "checked_in": checked_in,
+    }
+
+
+def _page(db: Session, response: Response, limit: int, cursor: Optional[str],
+          filters: dict, columns=None) -> list:
     try:
-        yield db
-    finally:
-        db.close()
+        rows, next_cursor = list_tickets(db, limit, cursor, filters, columns)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
 
 
 # -----------------------------
@@ -55,67 +160,252 @@ def create_tickets(
     - If tickets already exist for tx_ref, they are returned.
     """
 
-    # 🔒 Prevent duplicate ticket creation
-    if transaction_already_processed(db, payload.tx_ref):
+    # 🔒 Prevent duplicate ticket creation (unique order key, ON CONFLICT DO NOTHING)
+    event_id = get_hold_events(db, [payload.tx_ref]).get(payload.tx_ref, CURRENT_EVENT)
+    created = create_order_if_new(db, {
+        "tx_ref": payload.tx_ref,
+        "event_id": event_id,
+        "email": payload.email,
+        "phone": payload.phone,
+        "currency": "NGN",
+        "source": "manual",
+    })
+    if not created:
+        db.rollback()
         return get_tickets_by_original_tx_ref(db, payload.tx_ref)
 
-    tickets: List = []
+    event = get_event_settings(db, event_id)
+    event_price = event.price if event else None
+    unpriced = unpriced_attendee(payload, event_price)
+    if unpriced is not None:
+        db.rollback()
+        raise HTTPException(
+            status_code=422, detail=f"attendees.{unpriced}.price is required: the event has no ticket price"
+        )
 
-    num_attendees = len(payload.attendees)
-    total_amount = sum(Decimal(att.price) for att in payload.attendees)
-    amount_per_attendee = (
-        total_amount / num_attendees if num_attendees else Decimal("0")
-    )
-
-    for attendee in payload.attendees:
-        ticket_id = generate_ticket_id()
-        qr_data = encrypt_qr_payload(ticket_id)
-
-        price = attendee.price if attendee.price else amount_per_attendee
-
-        # Mix original tx_ref with ticket ID
-        unique_tx_ref = f"{payload.tx_ref}-{ticket_id}"
-
-        ticket_data = {
-            "id": ticket_id,
-            "tx_ref": unique_tx_ref,
-            "full_name": attendee.full_name,
-            "email": payload.email,
-            "phone": payload.phone,
-            "department": attendee.department,
-            "level": attendee.level,
-            "gender": attendee.gender,
-            "price": price,
-            "currency": "NGN",
-            "payment_status": "successful",
-            "qr_data": qr_data,
-        }
-
-        ticket = create_ticket(db, ticket_data)
-        tickets.append(ticket)
+    # Takes over the checkout's seat hold, if any
+    # Admin sales go ahead after online sales close; only capacity stops them
+    if not convert_seat_hold(db, payload.tx_ref, len(payload.attendees), event_id, require_open=False):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Not enough seats left")
 
+    tickets_data = order_ticket_rows(
+        payload, issue_ticket_ids(len(payload.attendees)), event_id, event_price
+    )
+    tickets = create_tickets_bulk(db, tickets_data)
     db.commit()
+    stats_cache.clear()
+    order_cache.invalidate(payload.tx_ref)
+    note_write(payload.tx_ref)
     return tickets
 
 
 # -----------------------------
-# Fetch tickets by ORIGINAL tx_ref (PUBLIC)
+# Bulk import of booth sales (ADMIN ONLY)
 # -----------------------------
-@router.get("/by-tx-ref", response_model=List[TicketResponse])
-def fetch_tickets_by_tx_ref(
-    tx_ref: str,
-    db: Session = Depends(get_db),
+# Spawned (not forked) workers generating ticket ids and QR payloads
+import_executor = ProcessPoolExecutor(
+    max_workers=IMPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+)
+
+
+@router.post("/import", response_model=TicketImportResponse)
+async def import_tickets(
+    request: Request,
+    format: str = Query("csv", pattern="^(ndjson|csv)$"),
+    _: str = Depends(super_admin_required),
 ):
+    """
+    Imports many manually sold orders from the raw request body:
+    CSV (tx_ref,email,phone,full_name,gender,department,level,price;
+    one row per attendee) or NDJSON (the same fields per line, or one
+    order per line shaped like POST /api/tickets).
+
+    The upload is spooled to disk while it streams in, then imported
+    in chunks. Orders whose tx_ref exists are skipped, so a file can be
+    re-sent safely. Invalid rows are reported by line number.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+
+        def run():
+            lines = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+            try:
+                return import_orders(lines, format, IMPORT_CHUNK_SIZE, import_executor)
+            finally:
+                lines.detach()
+
+        try:
+            return await run_in_threadpool(run)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+
+# -----------------------------
+# Fetch tickets by ORIGINAL tx_ref (PUBLIC)
+# -----------------------------
+order_tickets_adapter = TypeAdapter(List[TicketResponse])
+
+# order_cache value of a miss, as distinct from a cached "not found" (None)
+_NOT_CACHED = object()
+
+
+def _order_entry(tickets: List[Ticket]) -> Optional[tuple]:
+    """
+    (etag, JSON body) for the order's tickets, or None when there are none.
+    """
+    if not tickets:
+        return None
+    body = order_tickets_adapter.dump_json(order_tickets_adapter.validate_python(tickets, from_attributes=True))
+    return _etag(body.decode()), body
+
+
+def _cache_order_entry(tx_ref: str, entry: Optional[tuple]):
+    order_cache.set(tx_ref, entry, None if entry else ORDER_NOT_FOUND_TTL)
+
+
+def _order_response(request: Request, entry: Optional[tuple]) -> Response:
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No tickets found for tx_ref",
+            headers={"Cache-Control": "no-store"},
+        )
+    etag, body = entry
+    return _cached_response(request, etag, lambda: body, "application/json")
+
+
+def fetch_tickets_by_tx_ref(request: Request, tx_ref: str):
     """
     Used by frontend after successful payment.
     Returns ALL tickets created from the same transaction.
+    Served from the read replica when one is configured. Responses
+    (including "not found yet", briefly) are cached per tx_ref and
+    carry an ETag.
+    """
+    entry = order_cache.get(tx_ref, _NOT_CACHED)
+    if entry is _NOT_CACHED:
+        entry = _order_entry(run_read(
+            lambda db: get_tickets_by_original_tx_ref(db, tx_ref), tx_ref, retry_empty=True
+        ))
+        _cache_order_entry(tx_ref, entry)
+    return _order_response(request, entry)
+
+
+async def fetch_tickets_by_tx_ref_async(request: Request, tx_ref: str):
+    entry = order_cache.get(tx_ref, _NOT_CACHED)
+    if entry is _NOT_CACHED:
+        entry = _order_entry(await run_read_async(
+            lambda db: ticket_async.get_tickets_by_original_tx_ref(db, tx_ref), tx_ref, retry_empty=True
+        ))
+        _cache_order_entry(tx_ref, entry)
+    return _order_response(request, entry)
+
+
+router.get("/by-tx-ref", response_model=List[TicketResponse])(
+    fetch_tickets_by_tx_ref_async if DB_ASYNC else fetch_tickets_by_tx_ref
+)
+
+
+# -----------------------------
+# QR images and order PDF (PUBLIC, needs the tx_ref)
+# -----------------------------
+QR_RENDERERS = {
+    "png": (render_qr_png, "image/png"),
+    "svg": (render_qr_svg, "image/svg+xml"),
+}
+
+# Rendered images keyed by qr_data, so re-issued QR codes never hit a stale entry
+qr_image_cache = TTLCache(maxsize=QR_IMAGE_CACHE_SIZE, ttl=3600)
+
+# Spawned (not forked) workers: the API process runs threads
+pdf_executor = ProcessPoolExecutor(
+    max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+)
+
+
+def _etag(*parts: str) -> str:
+    return '"' + hashlib.sha256("|".join(parts).encode()).hexdigest()[:32] + '"'
+
+
+def _cached_response(request: Request, etag: str, body_factory, media_type: str,
+                     headers: Optional[dict] = None) -> Response:
+    """
+    304 when the client already holds this version, else the rendered body.
+    Clients revalidate on every use (no-cache), so a re-issued QR code
+    shows up at once; unchanged content still comes back as a bodiless 304.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", **(headers or {})}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body_factory(), media_type=media_type, headers=headers)
+
+
+@router.get("/by-tx-ref/pdf")
+async def fetch_order_pdf(
+    request: Request,
+    tx_ref: str,
+):
     """
-    tickets = get_tickets_by_original_tx_ref(db, tx_ref)
+    Every ticket of an order in one printable PDF (one A6 page each).
+    Rendering runs in a process pool so large group orders do not
+    hold up the API workers.
+    """
+    def load(db: Session) -> List[dict]:
+        return [
+            {
+                "id": t.id,
+                "full_name": t.full_name,
+                "department": t.department,
+                "level": t.level,
+                "qr_data": t.qr_data,
+            }
+            for t in get_tickets_by_original_tx_ref(db, tx_ref)
+        ]
 
+    tickets = await run_in_threadpool(run_read, load, tx_ref, True)
     if not tickets:
         raise HTTPException(status_code=404, detail="No tickets found for tx_ref")
 
-    return tickets
+    etag = _etag("pdf", *(t["qr_data"] or "" for t in tickets))
+    headers = {"Content-Disposition": f'inline; filename="tickets-{tx_ref}.pdf"'}
+    if request.headers.get("if-none-match") == etag:
+        return _cached_response(request, etag, None, "application/pdf", headers)
+
+    pdf = await asyncio.get_running_loop().run_in_executor(
+        pdf_executor, render_tickets_pdf, tickets
+    )
+    return _cached_response(request, etag, lambda: pdf, "application/pdf", headers)
+
+
+@router.get("/{ticket_id}/qr.{fmt}")
+def fetch_ticket_qr(
+    request: Request,
+    ticket_id: str,
+    fmt: str,
+    tx_ref: str,
+):
+    """
+    QR code image (png or svg) for a ticket, so clients do not have to
+    render it. The order tx_ref is required, as for GET /by-tx-ref.
+    """
+    if fmt not in QR_RENDERERS:
+        raise HTTPException(status_code=404, detail="Unsupported format")
+
+    ticket = run_read(lambda db: get_ticket_by_id(db, ticket_id), tx_ref, retry_empty=True)
+    if not ticket or not ticket.qr_data or ticket.original_tx_ref != tx_ref:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    render, media_type = QR_RENDERERS[fmt]
+    key = (ticket.qr_data, fmt, QR_IMAGE_SCALE)
+    return _cached_response(
+        request,
+        _etag(*map(str, key)),
+        lambda: qr_image_cache.get_or_set(key, lambda: render(ticket.qr_data, QR_IMAGE_SCALE)),
+        media_type,
+    )
 
 
 # -----------------------------
@@ -123,10 +413,96 @@ def fetch_tickets_by_tx_ref(
 # -----------------------------
 @router.get("", response_model=List[TicketResponse])
 def fetch_all_tickets(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    filters: dict = Depends(ticket_filters),
     db: Session = Depends(get_db),
     _: str = Depends(super_admin_required),
 ):
-    return get_all_tickets(db)
+    """
+    Without `limit`, returns every ticket (legacy behaviour).
+    With `limit`, returns one keyset page, newest first; pass the
+    `X-Next-Cursor` response header back as `cursor` for the next page.
+    """
+    if limit is None and cursor is None and not any(v is not None for v in filters.values()):
+        return get_all_tickets(db)
+
+    return _page(db, response, limit or 100, cursor, filters)
+
+
+# -----------------------------
+# Compact ticket page (ADMIN ONLY)
+# -----------------------------
+@router.get("/compact", response_model=List[TicketSummaryResponse])
+def fetch_ticket_summaries(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    filters: dict = Depends(ticket_filters),
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    """
+    Same paging and filters as GET /api/tickets, but selects only the
+    columns the dashboard table shows.
+    """
+    rows = _page(db, response, limit, cursor, filters, SUMMARY_COLUMNS)
+    return [row._asdict() for row in rows]
+
+
+# -----------------------------
+# Dashboard stats (ADMIN ONLY)
+# -----------------------------
+@router.get("/stats", response_model=TicketStatsResponse)
+def fetch_ticket_stats(
+    event_id: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    return get_ticket_stats(db, event_id or CURRENT_EVENT)
+
+
+# -----------------------------
+# Streaming export (ADMIN ONLY)
+# -----------------------------
+def _export_rows(filters: dict, fmt: str):
+    # Own session: the response body is produced after the request
+    # dependencies have been torn down.
+    db = SessionLocal()
+    try:
+        names = [col.key for col in EXPORT_COLUMNS]
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            for i, row in enumerate(iter_tickets(db, EXPORT_COLUMNS, filters), 1):
+                writer.writerow(row)
+                if i % 500 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for row in iter_tickets(db, EXPORT_COLUMNS, filters):
+                yield json.dumps(dict(zip(names, row)), default=str) + "\n"
+    finally:
+        db.close()
+
+
+@router.get("/export")
+def export_tickets(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: dict = Depends(ticket_filters),
+    _: str = Depends(super_admin_required),
+):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(filters, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tickets.{format}"'},
+    )
 
 
 # -----------------------------
@@ -142,22 +518,124 @@ def remove_ticket(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
+    release_seats(db, 1, ticket.event_id)
     delete_ticket(db, ticket)
+    # Event mode would otherwise keep admitting it from memory
+    scan_index.forget(ticket.id)
     return {"message": "Ticket deleted"}
 
 
 # -----------------------------
 # Check ticket availability
 # -----------------------------
-@router.post("/check-availability", response_model=TicketAvailabilityResponse)
-def check_ticket_availability(
-    payload: TicketAvailabilityRequest,
+def _availability(event, conflict: Optional[str], seats_remaining: Optional[int]) -> dict:
+    if not event or not event.is_open:
+        return {"available": False, "reason": "sales_closed"}
+    if conflict:
+        return {"available": False, "reason": conflict}
+    if seats_remaining == 0:
+        return {"available": False, "reason": "sold_out", "seats_remaining": 0}
+    return {"available": True, "seats_remaining": seats_remaining}
+
+
+def check_ticket_availability(payload: TicketAvailabilityRequest):
+    def read(db: Session) -> dict:
+        return _availability(
+            get_event_settings(db),
+            find_contact_conflict(db, payload.email, payload.phone),
+            get_seats_remaining(db),
+        )
+
+    return run_read(read)
+
+
+async def check_ticket_availability_async(payload: TicketAvailabilityRequest):
+    async def read(db: AsyncSession) -> dict:
+        return _availability(
+            await get_event_settings_async(db),
+            await ticket_async.find_contact_conflict(db, payload.email, payload.phone),
+            await get_seats_remaining_async(db),
+        )
+
+    return await run_read_async(read)
+
+
+router.post("/check-availability", response_model=TicketAvailabilityResponse)(
+    check_ticket_availability_async if DB_ASYNC else check_ticket_availability
+)
+
+
+# -----------------------------
+# Seat holds (checkout)
+# -----------------------------
+# Anonymous endpoint that takes seats: limit how fast and how many per client
+hold_limiter = TokenBucketLimiter(rate=HOLD_RATE_PER_MINUTE / 60, capacity=HOLD_BURST)
+
+HOLD_REFUSALS = {
+    "sold_out": (409, "Sold out"),
+    "held_elsewhere": (409, "tx_ref is already held"),
+    "too_many_holds": (429, "Too many open holds"),
+}
+
+
+@router.post("/hold", response_model=SeatHoldResponse)
+def hold_seats(
+    payload: SeatHoldRequest,
+    request: Request,
     db: Session = Depends(get_db),
 ):
-    if get_ticket_by_email(db, payload.email):
-        return {"available": False, "reason": "email_already_used"}
+    """
+    Called when checkout starts. Holds seats for SEAT_HOLD_MINUTES;
+    the payment webhook converts the hold into tickets for the same
+    tx_ref. Repeating the call returns the existing hold. Keep the
+    returned release_token to cancel the hold.
+    """
+    if payload.seats > MAX_SEATS_PER_HOLD:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SEATS_PER_HOLD} seats per order")
+
+    ip = client_ip(request)
+    wait = hold_limiter.acquire(ip)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many hold requests",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+    event = get_event_settings(db)
+    if not event or not event.is_open:
+        raise HTTPException(status_code=409, detail="Sales are closed")
+
+    hold, refusal = place_seat_hold(
+        db, payload.tx_ref, payload.seats, SEAT_HOLD_MINUTES, ip, MAX_OPEN_HOLDS_PER_CLIENT
+    )
+    if not hold:
+        db.rollback()
+        status_code, detail = HOLD_REFUSALS[refusal]
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    db.commit()
+    return {
+        "tx_ref": hold.tx_ref,
+        "seats": hold.seats,
+        "expires_at": hold.expires_at,
+        "release_token": hold.release_token,
+        "seats_remaining": get_seats_remaining(db),
+    }
 
-    if get_ticket_by_phone(db, payload.phone):
-        return {"available": False, "reason": "phone_already_used"}
 
-    return {"available": True}
+@router.delete("/hold/{tx_ref}")
+def release_seat_hold(
+    tx_ref: str,
+    x_hold_token: str = Header(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Frees a hold when the buyer abandons checkout. Needs the
+    release_token from POST /hold in the X-Hold-Token header.
+    """
+    if not cancel_seat_hold(db, tx_ref, x_hold_token):
+        raise HTTPException(status_code=404, detail="Hold not found")
+
+    db.commit()
+    return {"message": "Hold released"}
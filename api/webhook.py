@@ -1,21 +1,22 @@
 from fastapi import APIRouter, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from decimal import Decimal
 
-from schemas.webhook import FlutterwaveWebhookPayload
-from crud.ticket import create_ticket
+from schemas.webhook import FlutterwaveWebhookPayload, WebhookInboxStats
+from crud.webhook_event import enqueue_webhook_event, get_webhook_inbox_stats
 from core.config import FLW_SECRET_HASH
-from core.crypto import encrypt_qr_payload
-from utils.id_generator import generate_ticket_id
-from database.session import SessionLocal
+from core.dependencies import super_admin_required
+from workers.webhook_inbox import inbox_workers
+from database.session import SessionLocal, get_db
 
 router = APIRouter(prefix="/api/webhook", tags=["Webhook"])
 
 
-def get_db():
+
+def _store_event(raw_payload: str, tx_ref: str):
     db = SessionLocal()
     try:
-        yield db
+        enqueue_webhook_event(db, raw_payload, tx_ref)
     finally:
         db.close()
 
@@ -24,8 +25,11 @@ def get_db():
 async def flutterwave_webhook(
     request: Request,
     payload: FlutterwaveWebhookPayload,
-    db: Session = Depends(get_db),
 ):
+    """
+    Verifies and persists the event, then returns immediately.
+    Tickets are created by the inbox workers (workers/webhook_inbox.py).
+    """
     # -----------------------------
     # 1. Verify Flutterwave webhook
     # -----------------------------
@@ -41,67 +45,22 @@ async def flutterwave_webhook(
     if str(data.status).lower() != "successful":
         return {"status": "ignored"}
 
-    tickets_created = []
-
     # -----------------------------
-    # 3. Extract attendees safely
+    # 3. Persist raw event off the event loop
     # -----------------------------
-    attendees = data.meta.attendees if data.meta and data.meta.attendees else []
+    raw_payload = (await request.body()).decode()
+    await run_in_threadpool(_store_event, raw_payload, data.tx_ref)
+    inbox_workers.notify()
 
-    # Fallback: create one ticket if no attendees sent
-    if not attendees:
-        attendees = [{"full_name": data.customer.name, "gender": "N/A",
-                      "department": "NACOS", "level": "N/A"}]
-
-    # -----------------------------
-    # 4. Calculate price per attendee
-    # -----------------------------
-    num_attendees = len(attendees)
-    total_amount = Decimal(data.amount)
-    amount_per_attendee = total_amount / num_attendees
-
-    # -----------------------------
-    # 5. Create tickets
-    # -----------------------------
-    for attendee in attendees:
-        ticket_id = generate_ticket_id()
-        qr_data = encrypt_qr_payload(ticket_id)
+    return {"status": "queued"}
 
-        price = Decimal(attendee.get("price")) if attendee.get("price") else amount_per_attendee
 
-        # Make tx_ref unique per ticket
-        unique_tx_ref = f"{data.tx_ref}-{ticket_id}"
-
-        ticket = create_ticket(
-            db,
-            {
-                "id": ticket_id,
-                "tx_ref": unique_tx_ref,
-                "full_name": attendee.get("full_name"),
-                "email": data.customer.email,
-                "phone": data.customer.phone_number or "",
-                "department": attendee.get("department", "N/A"),
-                "level": attendee.get("level", "N/A"),
-                "gender": attendee.get("gender", "N/A"),
-                "price": price,
-                "currency": data.currency,
-                "payment_status": data.status,
-                "qr_data": qr_data,
-            },
-        )
-
-        tickets_created.append({
-            "ticketId": ticket.id,
-            "qrData": qr_data,
-            "full_name": ticket.full_name,
-        })
-
-    # -----------------------------
-    # 6. Commit all tickets once
-    # -----------------------------
-    db.commit()
-
-    return {
-        "status": "success",
-        "tickets": tickets_created,
-    }
+# -----------------------------
+# Inbox metrics (ADMIN ONLY)
+# -----------------------------
+@router.get("/inbox", response_model=WebhookInboxStats)
+def webhook_inbox_stats(
+    db: Session = Depends(get_db),
+    _: str = Depends(super_admin_required),
+):
+    return get_webhook_inbox_stats(db)
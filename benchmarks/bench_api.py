@@ -0,0 +1,390 @@
+"""
+End-to-end API benchmarks: webhook bursts, gate scans, admin listing, login storms.
+
+    python benchmarks/bench_api.py [--quick] [--save benchmarks/baseline.json]
+    python benchmarks/bench_api.py --compare benchmarks/baseline.json
+
+Runs against the FastAPI app from main.py in-process (httpx ASGI transport).
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL points at a
+Postgres stand-in. Reports p50/p95/p99 latency, throughput and DB round
+trips (statements executed) per request. With --compare, exits non-zero
+when a scenario's p95 or throughput is worse than the baseline by more
+than --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark settings; must be in place before core.config is imported
+_workdir = tempfile.mkdtemp(prefix="nacos-bench-")
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'bench.db')}"
+)
+os.environ.setdefault("JWT_SECRET", "bench-secret-bench-secret-bench-secret")
+os.environ.setdefault("FLW_SECRET_HASH", "bench")
+if "QR_SECRET" not in os.environ:
+    from cryptography.fernet import Fernet
+    os.environ["QR_SECRET"] = Fernet.generate_key().decode()
+os.environ["WEBHOOK_WORKERS"] = "0"        # the bench drains the inbox itself
+os.environ["EVENT_CAPACITY"] = "0"
+os.environ["TRUST_PROXY_HEADERS"] = "true"  # login storm spreads over client IPs
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from main import app  # noqa: E402
+from core.config import FLW_SECRET_HASH, CURRENT_EVENT  # noqa: E402
+from core.security import create_access_token, hash_password  # noqa: E402
+from crud.admin import admin_cache  # noqa: E402
+from crud.ticket import create_tickets_bulk  # noqa: E402
+from database.session import SessionLocal, engine  # noqa: E402
+from init_db import migrate  # noqa: E402
+from models.admin import Admin  # noqa: E402
+from models.ticket import Ticket  # noqa: E402
+from workers.webhook_inbox import drain_inbox  # noqa: E402
+
+ADMIN_PASSWORD = "bench-password"
+
+
+# =========================
+# Measurement
+# =========================
+class StatementCounter:
+    """
+    Counts statements sent to the database (one round trip each).
+    """
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+statements = StatementCounter()
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _summary(latencies, elapsed: float, queries: int, statuses: Counter) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "queries_per_req": round(queries / len(latencies), 2) if latencies else 0.0,
+        "statuses": dict(sorted((str(k), v) for k, v in statuses.items())),
+    }
+
+
+async def run_requests(client: httpx.AsyncClient, requests, concurrency: int) -> dict:
+    """
+    Sends (method, url, kwargs) tuples with at most `concurrency` in flight.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def send(method, url, kwargs):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    before = statements.count
+    start = time.perf_counter()
+    await asyncio.gather(*(send(*request) for request in requests))
+    elapsed = time.perf_counter() - start
+    return _summary(latencies, elapsed, statements.count - before, statuses)
+
+
+def timed_job(fn, units: int) -> dict:
+    """
+    Times a blocking job that handles `units` items (e.g. inbox drain).
+    """
+    before = statements.count
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    per_unit = elapsed / units
+    return _summary([per_unit] * units, elapsed, statements.count - before, Counter())
+
+
+# =========================
+# Fixtures
+# =========================
+def _admin_headers() -> dict:
+    return {"Authorization": f"Bearer {create_access_token()}"}
+
+
+def _webhook_body(group_size: int, seq: int) -> dict:
+    return {
+        "event": "charge.completed",
+        "data": {
+            "id": f"bench-{uuid.uuid4().hex}",
+            "tx_ref": f"bench-{seq}-{uuid.uuid4().hex[:8]}",
+            "amount": 5000 * group_size,
+            "currency": "NGN",
+            "status": "successful",
+            "customer": {
+                "name": f"Buyer {seq}",
+                "email": f"buyer{seq}@example.com",
+                "phone_number": f"080{seq:08d}",
+            },
+            "meta": {
+                "attendees": [
+                    {"full_name": f"Attendee {seq}-{i}", "department": "CS", "level": "300"}
+                    for i in range(group_size)
+                ]
+            },
+        },
+    }
+
+
+def seed_tickets(total: int, chunk: int = 5000):
+    """
+    Grows the tickets table to `total` rows with synthetic orders.
+    """
+    db = SessionLocal()
+    try:
+        existing = db.query(Ticket.id).count()
+        departments = ("CS", "SE", "IT", "CYB")
+        for start in range(existing, total, chunk):
+            rows = []
+            for n in range(start, min(start + chunk, total)):
+                ticket_id = f"SEED-{n:08d}"
+                rows.append({
+                    "id": ticket_id,
+                    "event_id": CURRENT_EVENT,
+                    "tx_ref": f"seed-{n // 4}-{ticket_id}",
+                    "original_tx_ref": f"seed-{n // 4}",
+                    "full_name": f"Seed {n}",
+                    "email": f"seed{n // 4}@example.com",
+                    "phone": f"070{n // 4:08d}",
+                    "department": departments[n % len(departments)],
+                    "level": str(100 * (1 + n % 5)),
+                    "gender": "F" if n % 2 else "M",
+                    "price": Decimal("5000"),
+                    "currency": "NGN",
+                    "payment_status": "successful",
+                    "qr_data": f"seed-qr-{ticket_id}",
+                })
+            create_tickets_bulk(db, rows)
+            db.commit()
+    finally:
+        db.close()
+
+
+def seed_admin():
+    db = SessionLocal()
+    try:
+        if not db.query(Admin).first():
+            db.add(Admin(id="super_admin", password_hash=hash_password(ADMIN_PASSWORD)))
+            db.commit()
+        admin_cache.clear()
+    finally:
+        db.close()
+
+
+# =========================
+# Scenarios
+# =========================
+async def bench_webhooks(client, results: dict, payments: int, concurrency: int):
+    # Group sizes cycle through 1..20 attendees
+    bodies = [_webhook_body(1 + seq % 20, seq) for seq in range(payments)]
+    headers = {"verif-hash": FLW_SECRET_HASH}
+    results["webhook_burst"] = await run_requests(
+        client,
+        [("POST", "/api/webhook/flutterwave", {"json": body, "headers": headers}) for body in bodies],
+        concurrency,
+    )
+    results["webhook_drain"] = timed_job(drain_inbox, payments)
+    results["webhook_drain"]["tickets"] = sum(1 + seq % 20 for seq in range(payments))
+
+
+async def bench_scans(client, results: dict, scans: int, concurrency: int, duplicate_ratio: float):
+    db = SessionLocal()
+    try:
+        tickets = (
+            db.query(Ticket.qr_data)
+            .filter(Ticket.is_checked_in == False, ~Ticket.id.like("SEED-%"))
+            .limit(scans)
+            .all()
+        )
+    finally:
+        db.close()
+
+    codes = [row.qr_data for row in tickets]
+    # A share of the scans re-present an already used code
+    duplicates = codes[: int(len(codes) * duplicate_ratio)]
+    headers = _admin_headers()
+    requests = [
+        ("POST", "/api/scan", {"json": {"qr_data": code, "gate_id": f"gate-{i % 4}"}, "headers": headers})
+        for i, code in enumerate(codes + duplicates)
+    ]
+    results["scan"] = await run_requests(client, requests, concurrency)
+
+
+async def bench_listing(client, results: dict, sizes, pages: int, concurrency: int):
+    headers = _admin_headers()
+    for size in sizes:
+        seed_tickets(size)
+        label = f"{size // 1000}k"
+
+        # Follow the keyset cursor through the first `pages` pages
+        latencies, statuses = [], Counter()
+        before = statements.count
+        start = time.perf_counter()
+        cursor = None
+        for _ in range(pages):
+            params = {"limit": 100}
+            if cursor:
+                params["cursor"] = cursor
+            t0 = time.perf_counter()
+            response = await client.get("/api/tickets/compact", params=params, headers=headers)
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.status_code] += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        results[f"list_compact_{label}"] = _summary(
+            latencies, time.perf_counter() - start, statements.count - before, statuses
+        )
+
+        results[f"stats_{label}"] = await run_requests(
+            client, [("GET", "/api/tickets/stats", {"headers": headers})] * pages, concurrency
+        )
+
+        # Legacy full listing; too slow to be meaningful beyond 10k rows
+        if size <= 10000:
+            results[f"list_full_{label}"] = await run_requests(
+                client, [("GET", "/api/tickets", {"headers": headers})] * 3, 1
+            )
+
+
+async def bench_logins(client, results: dict, attempts: int, concurrency: int, ips: int):
+    seed_admin()
+    requests = []
+    for i in range(attempts):
+        password = ADMIN_PASSWORD if i % 5 == 0 else "wrong-password"
+        requests.append((
+            "POST",
+            "/api/auth/login",
+            {"json": {"password": password}, "headers": {"X-Forwarded-For": f"10.0.0.{i % ips}"}},
+        ))
+    results["login_storm"] = await run_requests(client, requests, concurrency)
+
+
+# =========================
+# Baseline comparison
+# =========================
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Prints per-scenario deltas; returns True when nothing regressed.
+    """
+    ok = True
+    print(f"\n{'scenario':<20} {'p95 base':>10} {'p95 now':>10} {'rps base':>10} {'rps now':>10}")
+    for name, base in baseline["results"].items():
+        now = results.get(name)
+        if not now:
+            continue
+        regressed = (
+            now["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+            or now["rps"] < base["rps"] * (1 - tolerance)
+        )
+        ok = ok and not regressed
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{name:<20} {base['p95_ms']:>10} {now['p95_ms']:>10} "
+              f"{base['rps']:>10} {now['rps']:>10}{flag}")
+    return ok
+
+
+def print_table(results: dict):
+    print(f"{'scenario':<20} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'req/s':>9} {'queries':>8}  statuses")
+    for name, r in results.items():
+        print(f"{name:<20} {r['count']:>6} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} "
+              f"{r['rps']:>9} {r['queries_per_req']:>8}  {r['statuses']}")
+
+
+async def run(args) -> dict:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await bench_webhooks(client, results, args.payments, args.concurrency)
+        await bench_scans(client, results, args.scans, args.concurrency, args.duplicates)
+        await bench_listing(client, results, args.sizes, args.pages, args.concurrency)
+        await bench_logins(client, results, args.logins, args.concurrency, args.ips)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--scans", type=int, default=1000)
+    parser.add_argument("--duplicates", type=float, default=0.2, help="share of scans repeated")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="ticket counts for listing")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--ips", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--save", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.payments, args.scans, args.pages, args.logins = 40, 200, 5, 30
+        args.sizes = "1000"
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+
+    migrate()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "meta": {
+                    "database": engine.dialect.name,
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "args": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+                },
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Ticket id generation: time-ordered ULID ids vs the legacy 8-hex ids.
+
+    python benchmarks/bench_ids.py [--n 200000] [--threads 4] [--insert 200000]
+
+Reports generation rate (single thread and contended), duplicates seen,
+compact QR size, and the cost of inserting each kind into an indexed
+SQLite table.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Dummy settings so core.config imports outside a deployment
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "bench")
+os.environ.setdefault("FLW_SECRET_HASH", "bench")
+os.environ.setdefault("QR_SECRET", "bench")
+
+from core.crypto import encode_compact_qr  # noqa: E402
+from utils.id_generator import generate_ticket_id  # noqa: E402
+
+
+def legacy_ticket_id() -> str:
+    return f"NACOS-{uuid.uuid4().hex[:8].upper()}"
+
+
+def _rate(generate, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        generate()
+    return n / (time.perf_counter() - start)
+
+
+def _threaded_rate(generate, n: int, threads: int):
+    """
+    (ids per second, duplicate ids seen) across `threads` threads.
+    """
+    per_thread = n // threads
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        ids = pool.map(lambda _: [generate() for _ in range(per_thread)], range(threads))
+        unique = len({ticket_id for batch in ids for ticket_id in batch})
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed, per_thread * threads - unique
+
+
+def _insert_seconds(ids) -> float:
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE tickets (id TEXT PRIMARY KEY, payload TEXT)")
+    start = time.perf_counter()
+    for offset in range(0, len(ids), 1000):
+        db.executemany("INSERT INTO tickets VALUES (?, 'x')", [(i,) for i in ids[offset:offset + 1000]])
+        db.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--insert", type=int, default=200000, help="rows per insert run (0 = skip)")
+    args = parser.parse_args()
+
+    print(f"{'scheme':<8} {'chars':>6} {'qr chars':>9} {'ids/s':>12} "
+          f"{f'ids/s x{args.threads}':>12} {'dupes':>6} {'insert s':>9}")
+    for name, generate in (("legacy", legacy_ticket_id), ("ulid", generate_ticket_id)):
+        sample = generate()
+        rate = _rate(generate, args.n)
+        threaded, dupes = _threaded_rate(generate, args.n, args.threads)
+        # Duplicates dropped here; in production they fail the insert
+        ids = list(dict.fromkeys(generate() for _ in range(args.insert)))
+        insert = f"{_insert_seconds(ids):>9.2f}" if args.insert else f"{'-':>9}"
+        print(f"{name:<8} {len(sample):>6} {len(encode_compact_qr(sample)):>9} "
+              f"{rate:>12,.0f} {threaded:>12,.0f} {dupes:>6} {insert}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+QR payload encode/decode throughput: compact HMAC tokens vs legacy Fernet.
+
+    python benchmarks/bench_qr.py [--n 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Dummy settings so core.config imports outside a deployment
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "bench")
+os.environ.setdefault("FLW_SECRET_HASH", "bench")
+if "QR_SECRET" not in os.environ:
+    from cryptography.fernet import Fernet
+    os.environ["QR_SECRET"] = Fernet.generate_key().decode()
+
+from core.crypto import (  # noqa: E402
+    encode_compact_qr,
+    decode_compact_qr,
+    encrypt_fernet_qr,
+    decrypt_fernet_qr,
+)
+from utils.id_generator import generate_ticket_id  # noqa: E402
+
+
+def _rate(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=20000)
+    args = parser.parse_args()
+
+    ids = [generate_ticket_id() for _ in range(args.n)]
+
+    print(f"{'format':<8} {'chars':>6} {'encode/s':>12} {'decode/s':>12}")
+    for name, encode, decode in (
+        ("compact", encode_compact_qr, decode_compact_qr),
+        ("fernet", encrypt_fernet_qr, decrypt_fernet_qr),
+    ):
+        encode_rate = _rate(encode, ids)
+        tokens = [encode(ticket_id) for ticket_id in ids]
+        decode_rate = _rate(decode, tokens)
+        chars = sum(map(len, tokens)) / len(tokens)
+        print(f"{name:<8} {chars:>6.0f} {encode_rate:>12,.0f} {decode_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Cold-start latency: importing main, running the lifespan, first /ping.
+
+    python benchmarks/bench_startup.py [--runs 5] [--top 15]
+
+Each run is a fresh interpreter, like a worker start or a cold start on
+the host. Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+--top lists the slowest imports (python -X importtime) of one run.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    ready = time.perf_counter()
+    client.get("/ping")
+    pinged = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_ping_ms": (pinged - ready) * 1000,
+    "total_ms": (pinged - started) * 1000,
+}))
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    workdir = tempfile.mkdtemp(prefix="nacos-startup-")
+    env["DATABASE_URL"] = os.getenv(
+        "BENCH_DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    )
+    env.setdefault("JWT_SECRET", "bench")
+    env.setdefault("FLW_SECRET_HASH", "bench")
+    if "QR_SECRET" not in env:
+        from cryptography.fernet import Fernet
+        env["QR_SECRET"] = Fernet.generate_key().decode()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def _top_imports(env: dict, top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    print("\nSlowest imports (cumulative):")
+    for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="show the N slowest imports")
+    args = parser.parse_args()
+
+    env = _env()
+    subprocess.run([sys.executable, "init_db.py"], cwd=ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    print(f"{'phase':<14} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for phase in ("import_ms", "lifespan_ms", "first_ping_ms", "total_ms"):
+        values = [run[phase] for run in runs]
+        print(f"{phase[:-3]:<14} {statistics.median(values):>10.1f} "
+              f"{min(values):>10.1f} {max(values):>10.1f}")
+
+    if args.top:
+        _top_imports(env, args.top)
+
+
+if __name__ == "__main__":
+    main()
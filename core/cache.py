@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with per-entry TTL and LRU eviction.
+    Each worker process has its own copy, so keep TTLs short.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,32 +1,218 @@
 import os
+from typing import Mapping
 
-# =========================
-# Database
-# =========================
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set")
-
-# =========================
-# JWT
-# =========================
-JWT_SECRET = os.getenv("JWT_SECRET")
-if not JWT_SECRET:
-    raise RuntimeError("JWT_SECRET is not set")
-
-JWT_ALGORITHM = "HS256"
-JWT_EXPIRE_MINUTES = 120
-
-# =========================
-# Flutterwave
-# =========================
-FLW_SECRET_HASH = os.getenv("FLW_SECRET_HASH")
-if not FLW_SECRET_HASH:
-    raise RuntimeError("FLW_SECRET_HASH is not set")
-
-# =========================
-# QR Encryption
-# =========================
-QR_SECRET = os.getenv("QR_SECRET")
-if not QR_SECRET:
-    raise RuntimeError("QR_SECRET is not set")
+
+def _required(env: Mapping[str, str], name: str) -> str:
+    value = env.get(name)
+    if not value:
+        raise RuntimeError(f"{name} is not set")
+    return value
+
+
+def _flag(env: Mapping[str, str], name: str, default: str) -> bool:
+    return env.get(name, default).lower() == "true"
+
+
+class Settings:
+    """
+    All configuration, read from the environment once at import.
+    `from core.config import NAME` resolves to `settings.NAME`, so every
+    module shares this one object.
+    """
+
+    def __init__(self, env: Mapping[str, str] = os.environ):
+        # =========================
+        # Database
+        # =========================
+        self.DATABASE_URL = _required(env, "DATABASE_URL")
+
+        # =========================
+        # JWT
+        # =========================
+        self.JWT_SECRET = _required(env, "JWT_SECRET")
+        self.JWT_ALGORITHM = "HS256"
+        self.JWT_EXPIRE_MINUTES = 120
+
+        # =========================
+        # Flutterwave
+        # =========================
+        self.FLW_SECRET_HASH = _required(env, "FLW_SECRET_HASH")
+
+        # =========================
+        # QR Encryption
+        # =========================
+        # Key ring for rotation: QR_SECRETS="B:<fernet key>,A:<fernet key>".
+        # Key ids are one character ([0-9A-Z]). The primary key (QR_PRIMARY_KEY_ID,
+        # default: first entry) signs new QR codes; the others only verify.
+        # Without QR_SECRETS, QR_SECRET is the only key, with id QR_KEY_ID.
+        self.QR_SECRET = env.get("QR_SECRET")
+        self.QR_SECRETS = env.get("QR_SECRETS")
+        self.QR_KEY_ID = env.get("QR_KEY_ID", "A")
+
+        if self.QR_SECRETS:
+            self.QR_KEYS = dict(
+                entry.strip().split(":", 1) for entry in self.QR_SECRETS.split(",") if entry.strip()
+            )
+        elif self.QR_SECRET:
+            self.QR_KEYS = {self.QR_KEY_ID: self.QR_SECRET}
+        else:
+            raise RuntimeError("QR_SECRET is not set")
+
+        if any(len(key_id) != 1 for key_id in self.QR_KEYS):
+            raise RuntimeError("QR key ids must be a single character")
+
+        self.QR_PRIMARY_KEY_ID = env.get("QR_PRIMARY_KEY_ID") or next(iter(self.QR_KEYS))
+        if self.QR_PRIMARY_KEY_ID not in self.QR_KEYS:
+            raise RuntimeError("QR_PRIMARY_KEY_ID is not in the QR key ring")
+
+        # =========================
+        # Offline scanner manifest
+        # =========================
+        # Key shared with gate devices to verify exported manifests.
+        # Falls back to a key derived from the primary QR key so the QR key itself
+        # never has to leave the server.
+        self.MANIFEST_SECRET = env.get("MANIFEST_SECRET")
+
+        # =========================
+        # Webhook inbox workers
+        # =========================
+        self.WEBHOOK_WORKERS = int(env.get("WEBHOOK_WORKERS", "2"))            # 0 = run `python webhook_worker.py` separately
+        self.WEBHOOK_POLL_INTERVAL = float(env.get("WEBHOOK_POLL_INTERVAL", "1.0"))
+        self.WEBHOOK_MAX_ATTEMPTS = int(env.get("WEBHOOK_MAX_ATTEMPTS", "5"))
+        self.WEBHOOK_CLAIM_TIMEOUT = int(env.get("WEBHOOK_CLAIM_TIMEOUT", "300"))  # seconds before a stuck claim is retried
+        self.WEBHOOK_METRICS_INTERVAL = float(env.get("WEBHOOK_METRICS_INTERVAL", "15"))  # seconds between inbox gauge updates
+
+        # =========================
+        # Caching
+        # =========================
+        self.STATS_CACHE_TTL = float(env.get("STATS_CACHE_TTL", "5"))  # seconds
+        # GET /by-tx-ref responses per order, dropped when this process
+        # creates or deletes the order's tickets
+        self.ORDER_CACHE_SIZE = int(env.get("ORDER_CACHE_SIZE", "2048"))
+        self.ORDER_CACHE_TTL = float(env.get("ORDER_CACHE_TTL", "300"))          # seconds
+        self.ORDER_NOT_FOUND_TTL = float(env.get("ORDER_NOT_FOUND_TTL", "2"))    # seconds a 404 is reused while polling
+
+        # =========================
+        # Live check-in feed (SSE)
+        # =========================
+        self.FEED_QUEUE_SIZE = int(env.get("FEED_QUEUE_SIZE", "100"))          # events buffered per client
+        self.FEED_STATS_INTERVAL = float(env.get("FEED_STATS_INTERVAL", "10"))  # seconds between counter events
+        # Lifetime of the ?token= used to open the feed; it ends up in access logs
+        self.FEED_TOKEN_MINUTES = int(env.get("FEED_TOKEN_MINUTES", "1"))
+
+        # =========================
+        # QR payload format
+        # =========================
+        # "compact": short HMAC-signed token (small, fast-to-read QR codes)
+        # "fernet":  legacy encrypted JSON token
+        # Both formats are always accepted at the gate.
+        self.QR_FORMAT = env.get("QR_FORMAT", "compact")
+
+        # =========================
+        # Admin login protection
+        # =========================
+        self.BCRYPT_WORKERS = int(env.get("BCRYPT_WORKERS", "2"))            # dedicated threads for password checks
+        self.ADMIN_CACHE_TTL = float(env.get("ADMIN_CACHE_TTL", "60"))       # seconds the admin hash is cached
+        self.LOGIN_RATE_PER_MINUTE = float(env.get("LOGIN_RATE_PER_MINUTE", "10"))
+        self.LOGIN_BURST = int(env.get("LOGIN_BURST", "5"))
+        self.LOGIN_BACKOFF_BASE = float(env.get("LOGIN_BACKOFF_BASE", "1"))  # seconds, doubles per failure
+        self.LOGIN_BACKOFF_MAX = float(env.get("LOGIN_BACKOFF_MAX", "300"))
+        # Take the client IP from X-Forwarded-For (only behind a trusted proxy).
+        # Proxies append to the header, so the address is read TRUSTED_PROXY_HOPS
+        # entries from the right; anything further left is client-supplied
+        self.TRUST_PROXY_HEADERS = _flag(env, "TRUST_PROXY_HEADERS", "false")
+        self.TRUSTED_PROXY_HOPS = int(env.get("TRUSTED_PROXY_HOPS", "1"))   # proxies in front of the app
+
+        # =========================
+        # Token verification
+        # =========================
+        self.TOKEN_CACHE_SIZE = int(env.get("TOKEN_CACHE_SIZE", "1024"))              # verified tokens kept in memory
+        self.REVOCATION_REFRESH_SECONDS = float(env.get("REVOCATION_REFRESH_SECONDS", "5"))
+        self.SCANNER_TOKEN_MINUTES = int(env.get("SCANNER_TOKEN_MINUTES", "360"))      # device-scoped gate tokens
+
+        # =========================
+        # Database pool / async engine
+        # =========================
+        self.DB_POOL_SIZE = int(env.get("DB_POOL_SIZE", "5"))
+        self.DB_MAX_OVERFLOW = int(env.get("DB_MAX_OVERFLOW", "10"))
+        self.DB_POOL_TIMEOUT = float(env.get("DB_POOL_TIMEOUT", "30"))   # seconds to wait for a connection
+        # Serve the hot endpoints (scan, by-tx-ref, availability) from an
+        # AsyncSession. Needs asyncpg (Postgres) or aiosqlite (SQLite).
+        self.DB_ASYNC = _flag(env, "DB_ASYNC", "false")
+        self.ASYNC_DATABASE_URL = env.get("ASYNC_DATABASE_URL")          # derived from DATABASE_URL when unset
+        # Schema changes run via `python init_db.py`; set this to also run
+        # them when the app starts (single-instance deploys only)
+        self.MIGRATE_ON_STARTUP = _flag(env, "MIGRATE_ON_STARTUP", "false")
+
+        # =========================
+        # Read replica
+        # =========================
+        # Public reads (GET /by-tx-ref, POST /check-availability) use this
+        # database while it is reachable and not lagging; unset = primary only
+        self.REPLICA_DATABASE_URL = env.get("REPLICA_DATABASE_URL")
+        self.ASYNC_REPLICA_DATABASE_URL = env.get("ASYNC_REPLICA_DATABASE_URL")  # derived when unset
+        self.REPLICA_MAX_LAG_SECONDS = float(env.get("REPLICA_MAX_LAG_SECONDS", "5"))
+        self.REPLICA_CHECK_INTERVAL = float(env.get("REPLICA_CHECK_INTERVAL", "2"))  # seconds between lag checks
+        # An order's tickets are read from the primary for this long after
+        # this process commits them; 0 = off
+        self.READ_YOUR_WRITES_SECONDS = float(env.get("READ_YOUR_WRITES_SECONDS", "10"))
+
+        # =========================
+        # Capacity / seat holds
+        # =========================
+        # Capacity given to CURRENT_EVENT when init_db first creates it; later
+        # changes go through PATCH /api/events/{id}. 0 = unlimited
+        self.EVENT_CAPACITY = int(env.get("EVENT_CAPACITY", "0"))
+        self.SEAT_HOLD_MINUTES = int(env.get("SEAT_HOLD_MINUTES", "15"))   # how long checkout keeps seats
+        self.MAX_SEATS_PER_HOLD = int(env.get("MAX_SEATS_PER_HOLD", "10"))
+        self.HOLD_RATE_PER_MINUTE = float(env.get("HOLD_RATE_PER_MINUTE", "10"))  # hold requests per client IP
+        self.HOLD_BURST = int(env.get("HOLD_BURST", "5"))
+        self.MAX_OPEN_HOLDS_PER_CLIENT = int(env.get("MAX_OPEN_HOLDS_PER_CLIENT", "2"))
+
+        # =========================
+        # Events
+        # =========================
+        # Event this deployment sells and scans for; scan, listing and stats
+        # queries only touch its tickets. Lowercase letters, digits and "_".
+        self.CURRENT_EVENT = env.get("CURRENT_EVENT", "default")
+        self.EVENT_CACHE_TTL = float(env.get("EVENT_CACHE_TTL", "30"))   # seconds event settings are cached
+        # Postgres only: `python init_db.py` converts tickets into a table
+        # list-partitioned by event_id (one partition per event)
+        self.TICKETS_PARTITIONED = _flag(env, "TICKETS_PARTITIONED", "false")
+
+        # =========================
+        # Metrics
+        # =========================
+        self.METRICS_ENABLED = _flag(env, "METRICS_ENABLED", "true")       # GET /metrics + hooks
+        self.SLOW_REQUEST_MS = float(env.get("SLOW_REQUEST_MS", "0"))   # log slower requests with their SQL; 0 = off
+
+        # =========================
+        # QR images / ticket PDFs
+        # =========================
+        self.QR_IMAGE_SCALE = int(env.get("QR_IMAGE_SCALE", "8"))                # pixels per module (PNG)
+        self.QR_IMAGE_CACHE_SIZE = int(env.get("QR_IMAGE_CACHE_SIZE", "1024"))   # rendered images kept in memory
+        self.PDF_WORKERS = int(env.get("PDF_WORKERS", "2"))                      # processes rendering order PDFs
+
+        # =========================
+        # Bulk ticket import
+        # =========================
+        self.IMPORT_WORKERS = int(env.get("IMPORT_WORKERS", "2"))          # processes generating ticket ids / QR payloads
+        self.IMPORT_CHUNK_SIZE = int(env.get("IMPORT_CHUNK_SIZE", "200"))  # orders per transaction
+
+        # =========================
+        # Event mode (in-memory scan index)
+        # =========================
+        self.EVENT_MODE = _flag(env, "EVENT_MODE", "false")   # preload tickets at startup
+        self.SCAN_FLUSH_INTERVAL = float(env.get("SCAN_FLUSH_INTERVAL", "1"))  # seconds between write-behind batches
+        self.SCAN_FLUSH_BATCH = int(env.get("SCAN_FLUSH_BATCH", "200"))        # flush early at this many pending
+        self.SCAN_JOURNAL_PATH = env.get("SCAN_JOURNAL_PATH", "scan_journal.log")
+
+
+settings = Settings()
+
+
+def __getattr__(name: str):
+    try:
+        return getattr(settings, name)
+    except AttributeError:
+        raise AttributeError(f"module 'core.config' has no attribute '{name}'") from None
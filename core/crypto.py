@@ -1,29 +1,220 @@
+import base64
+import hashlib
+import hmac
 import json
-from cryptography.fernet import Fernet, InvalidToken
-from core.config import QR_SECRET
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Tuple
+from core.config import QR_KEYS, QR_PRIMARY_KEY_ID, MANIFEST_SECRET, QR_FORMAT
+from core.metrics import timed
+from utils.id_generator import TICKET_ID_PREFIX, ULID_ID, INT_BASE32_DIGITS, ulid_from_text, ulid_to_text
 
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet, MultiFernet
 
-# Ensure key is bytes
-fernet = Fernet(QR_SECRET.encode())
 
+def _derive(secret: str, purpose: bytes) -> bytes:
+    return hmac.new(secret.encode(), purpose, hashlib.sha256).digest()
 
+
+# =========================
+# Key ring
+# =========================
+# Primary key encrypts/signs; every key in the ring can still verify,
+# so rotating QR_SECRETS does not invalidate issued tickets.
+# Keys are built on first use so importing this module stays cheap;
+# the cryptography package is only loaded once a Fernet token is handled.
+@lru_cache(maxsize=None)
+def fernet_keys() -> Tuple["Fernet", "MultiFernet"]:
+    """
+    (primary Fernet, MultiFernet over the whole ring)
+    """
+    from cryptography.fernet import Fernet, MultiFernet
+
+    primary = Fernet(QR_KEYS[QR_PRIMARY_KEY_ID].encode())
+    others = [Fernet(secret.encode()) for key_id, secret in QR_KEYS.items() if key_id != QR_PRIMARY_KEY_ID]
+    return primary, MultiFernet([primary] + others)
+
+
+@lru_cache(maxsize=None)
+def compact_keys() -> Dict[str, bytes]:
+    return {
+        key_id: _derive(secret, b"nacos-qr-compact") for key_id, secret in QR_KEYS.items()
+    }
+
+
+@lru_cache(maxsize=None)
+def manifest_key() -> bytes:
+    """
+    Key used to sign offline scanner manifests
+    """
+    if MANIFEST_SECRET:
+        return MANIFEST_SECRET.encode()
+    return _derive(QR_KEYS[QR_PRIMARY_KEY_ID], b"nacos-scan-manifest")
+
+
+# =========================
+# Compact QR format (v1)
+# =========================
+# "N1" + key id (1 char) + base32(kind || id bytes || tag)
+#   kind 0x01: "NACOS-" + 8 hex chars, packed into 4 bytes
+#   kind 0x02: "NACOS-" + ULID, packed into 16 bytes
+#   kind 0x00: any other id, UTF-8
+#   tag: HMAC-SHA256 over everything before it, truncated to 10 bytes
+# Only uses QR alphanumeric-mode characters, so codes stay small.
+COMPACT_PREFIX = "N1"
+COMPACT_TAG_BYTES = 10
+_KIND_RAW = 0
+_KIND_SHORT_HEX = 1
+_KIND_ULID = 2
+
+_SHORT_HEX_ID = re.compile(r"^NACOS-([0-9A-F]{8})$")
+
+# RFC 4648 base32 chars to int(..., 32) digits; anything else to "!", which
+# int() rejects. Decoding through int is several times faster than the
+# pure-Python base64.b32decode.
+_B32_TO_INT = str.maketrans({
+    **{chr(c): "!" for c in range(128)},
+    **dict(zip("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", INT_BASE32_DIGITS)),
+})
+
+
+def _b32decode(encoded: str) -> bytes:
+    """
+    Unpadded base32 to bytes. Raises ValueError for invalid characters
+    or non-zero padding bits (one spelling per payload).
+    """
+    if not encoded.isascii():
+        raise ValueError("Invalid base32")
+    size = len(encoded) * 5 // 8
+    padding = len(encoded) * 5 - size * 8
+    value = int(encoded.translate(_B32_TO_INT), 32)
+    if value & ((1 << padding) - 1):
+        raise ValueError("Invalid base32")
+    return (value >> padding).to_bytes(size, "big")
+
+
+@timed("qr_encrypt")
 def encrypt_qr_payload(ticket_id: str) -> str:
+    """
+    Builds the QR payload for a ticket in the configured QR_FORMAT
+    """
+    if QR_FORMAT == "compact":
+        return encode_compact_qr(ticket_id)
+    return encrypt_fernet_qr(ticket_id)
+
+
+@timed("qr_decrypt")
+def decrypt_qr_payload(encrypted_data: str) -> str:
+    """
+    Verifies a QR payload (compact or legacy Fernet) and returns ticket_id
+    """
+    if encrypted_data.startswith(COMPACT_PREFIX):
+        return decode_compact_qr(encrypted_data)
+    return decrypt_fernet_qr(encrypted_data)
+
+
+def qr_payload_is_current(qr_data: str) -> bool:
+    """
+    True when a payload is already in QR_FORMAT under the primary key,
+    i.e. key rotation does not need to re-issue it.
+    """
+    if qr_data.startswith(COMPACT_PREFIX):
+        return QR_FORMAT == "compact" and qr_data[len(COMPACT_PREFIX):][:1] == QR_PRIMARY_KEY_ID
+    if QR_FORMAT != "fernet":
+        return False
+    from cryptography.fernet import InvalidToken
+    try:
+        fernet_keys()[0].decrypt(qr_data.encode())
+        return True
+    except InvalidToken:
+        return False
+
+
+def encode_compact_qr(ticket_id: str, key_id: str = QR_PRIMARY_KEY_ID) -> str:
+    short_hex = _SHORT_HEX_ID.match(ticket_id)
+    ulid = ULID_ID.match(ticket_id)
+    if short_hex:
+        body = bytes([_KIND_SHORT_HEX]) + bytes.fromhex(short_hex.group(1))
+    elif ulid:
+        body = bytes([_KIND_ULID]) + ulid_from_text(ulid.group(1))
+    else:
+        body = bytes([_KIND_RAW]) + ticket_id.encode()
+
+    header = (COMPACT_PREFIX + key_id).encode()
+    tag = hmac.new(compact_keys()[key_id], header + body, hashlib.sha256).digest()
+    encoded = base64.b32encode(body + tag[:COMPACT_TAG_BYTES]).decode().rstrip("=")
+    return COMPACT_PREFIX + key_id + encoded
+
+
+def decode_compact_qr(token: str) -> str:
+    try:
+        key_id = token[len(COMPACT_PREFIX)]
+        key = compact_keys()[key_id]
+        encoded = token[len(COMPACT_PREFIX) + 1:]
+        raw = _b32decode(encoded)
+    except (IndexError, KeyError, ValueError):
+        raise ValueError("Invalid or tampered QR code")
+
+    body, tag = raw[:-COMPACT_TAG_BYTES], raw[-COMPACT_TAG_BYTES:]
+    header = (COMPACT_PREFIX + key_id).encode()
+    expected = hmac.new(key, header + body, hashlib.sha256).digest()[:COMPACT_TAG_BYTES]
+    if len(body) < 2 or not hmac.compare_digest(tag, expected):
+        raise ValueError("Invalid or tampered QR code")
+
+    kind, id_bytes = body[0], body[1:]
+    if kind == _KIND_SHORT_HEX and len(id_bytes) == 4:
+        return f"NACOS-{id_bytes.hex().upper()}"
+    if kind == _KIND_ULID and len(id_bytes) == 16:
+        return TICKET_ID_PREFIX + ulid_to_text(id_bytes)
+    if kind == _KIND_RAW:
+        return id_bytes.decode()
+    raise ValueError("Invalid or tampered QR code")
+
+
+# =========================
+# Legacy Fernet format
+# =========================
+def encrypt_fernet_qr(ticket_id: str) -> str:
     """
     Encrypts ticket payload for QR code
     """
     payload = {"ticket_id": ticket_id}
     json_payload = json.dumps(payload).encode()
-    encrypted = fernet.encrypt(json_payload)
+    encrypted = fernet_keys()[1].encrypt(json_payload)
     return encrypted.decode()
 
 
-def decrypt_qr_payload(encrypted_data: str) -> str:
+def decrypt_fernet_qr(encrypted_data: str) -> str:
     """
     Decrypts QR payload and returns ticket_id
     """
+    from cryptography.fernet import InvalidToken
     try:
-        decrypted = fernet.decrypt(encrypted_data.encode())
+        decrypted = fernet_keys()[1].decrypt(encrypted_data.encode())
         payload = json.loads(decrypted.decode())
         return payload["ticket_id"]
     except (InvalidToken, KeyError, json.JSONDecodeError):
         raise ValueError("Invalid or tampered QR code")
+
+
+# =========================
+# Offline scanner manifest
+# =========================
+def qr_digest(qr_data: str) -> str:
+    """
+    Short fingerprint of a QR payload.
+    Lets scanners match a scanned code against the manifest
+    without holding the QR encryption key.
+    """
+    return hashlib.sha256(qr_data.encode()).hexdigest()[:16]
+
+
+@timed("manifest_sign")
+def sign_manifest(manifest: dict) -> str:
+    """
+    HMAC-SHA256 over the canonical JSON form of the manifest
+    (sorted keys, no whitespace).
+    """
+    body = json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode()
+    return hmac.new(manifest_key(), body, hashlib.sha256).hexdigest()
@@ -1,28 +1,71 @@
-from fastapi import Header, HTTPException, status
-from core.security import decode_access_token
+from fastapi import Header, HTTPException, Query, status
+from core.config import REVOCATION_REFRESH_SECONDS
+from core.security import verify_access_token, TokenRevocations, _jwt
+from crud.token_revocation import get_active_revocations
+from database.session import SessionLocal
 
 
-def super_admin_required(authorization: str = Header(...)):
-    """
-    Dependency to protect admin-only routes
-    """
+def _load_revocations():
+    db = SessionLocal()
+    try:
+        return get_active_revocations(db)
+    finally:
+        db.close()
+
+
+revocations = TokenRevocations(_load_revocations, REVOCATION_REFRESH_SECONDS)
+
+
+def _bearer_token(authorization: str) -> str:
     if not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authorization header",
         )
+    return authorization.split(" ")[1]
 
-    token = authorization.split(" ")[1]
 
+def _verify(token: str, allowed_subjects: tuple) -> dict:
     try:
-        payload = decode_access_token(token)
-        if payload.get("sub") != "super_admin":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Insufficient permissions",
-            )
-    except Exception:
+        claims = verify_access_token(token)
+    except _jwt().PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+
+    if revocations.is_revoked(claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+
+    if claims.get("sub") not in allowed_subjects:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Insufficient permissions",
+        )
+    return claims
+
+
+def super_admin_required(authorization: str = Header(...)) -> dict:
+    """
+    Dependency to protect admin-only routes
+    """
+    return _verify(_bearer_token(authorization), ("super_admin",))
+
+
+def scanner_required(authorization: str = Header(...)) -> dict:
+    """
+    Gate endpoints: the super admin or a device-scoped scanner token
+    """
+    return _verify(_bearer_token(authorization), ("super_admin", "scanner"))
+
+
+def feed_query_token(token: str = Query(...)) -> dict:
+    """
+    EventSource connections cannot send headers, so the check-in feed
+    takes a short-lived, feed-only token (POST /api/scan/feed/token) in
+    the query string instead of a full session token.
+    """
+    return _verify(token, ("feed",))
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from typing import List, Optional
+
+
+class Subscription:
+    """
+    One connected client. Events are buffered in a bounded queue; a client
+    that falls behind is dropped instead of slowing down publishers.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def _offer(self, event: dict):
+        # Runs on the subscriber's event loop
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)  # tells the reader to disconnect
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        Next event, or None once the subscription has been dropped.
+        Raises asyncio.TimeoutError when nothing arrives in time.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class EventBroker:
+    """
+    In-process pub/sub. publish() is safe to call from threadpool
+    endpoints; it never blocks on subscribers.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        """
+        Must be called from the event loop that will read the events.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # Loop already closed; the reader's cleanup will unsubscribe
+                pass
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
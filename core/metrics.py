@@ -0,0 +1,279 @@
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import SLOW_REQUEST_MS
+
+logger = logging.getLogger("nacos.slow_requests")
+
+# In-process histograms rendered in Prometheus text format on GET /metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# =========================
+# Metric types
+# =========================
+class Histogram:
+    """
+    Cumulative-bucket histogram keyed by label values.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+
+        for labels, values in sorted(series.items()):
+            base = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = ",".join(base + [f'le="{bound:g}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            le = ",".join(base + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{le}}} {values[-1]}")
+            suffix = "{" + ",".join(base) + "}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{suffix} {values[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Gauge:
+    """
+    Last-set value per label set.
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self._values.items()):
+            base = ",".join(f'{name}="{_escape(v)}"' for name, v in zip(self.labelnames, labels))
+            lines.append(f"{self.name}{{{base}}} {value:.6f}" if base else f"{self.name} {value:.6f}")
+        return lines
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template.",
+    ("method", "route", "status"),
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per request.",
+    ("route",), QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per request.", ("route",),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Latency of individual SQL statements.",
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to obtain a pooled connection.",
+)
+crypto_operation_duration = Histogram(
+    "crypto_operation_seconds", "QR, manifest and JWT crypto operations.", ("operation",),
+)
+
+startup_seconds = Gauge(
+    "app_startup_seconds", "Cold-start time: importing main, then the lifespan startup.", ("phase",),
+)
+replica_up = Gauge(
+    "db_replica_up", "1 while public reads are routed to the read replica.",
+)
+replica_lag_seconds = Gauge(
+    "db_replica_lag_seconds", "Replica replay lag at the last check.",
+)
+webhook_inbox_depth = Gauge(
+    "webhook_inbox_depth", "Webhook inbox events by status, refreshed by the inbox workers.", ("status",),
+)
+webhook_inbox_lag_seconds = Gauge(
+    "webhook_inbox_lag_seconds",
+    "Age of the oldest unprocessed webhook (oldest_pending) and mean receive-to-done "
+    "time of the last 100 processed (processing).",
+    ("kind",),
+)
+
+REGISTRY = [
+    http_request_duration,
+    db_queries_per_request,
+    db_time_per_request,
+    db_query_duration,
+    db_pool_checkout_wait,
+    crypto_operation_duration,
+    startup_seconds,
+    replica_up,
+    replica_lag_seconds,
+    webhook_inbox_depth,
+    webhook_inbox_lag_seconds,
+]
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# Per-request accounting
+# =========================
+class RequestStats:
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self, keep_statements: bool):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Optional[List[Tuple[float, str]]] = [] if keep_statements else None
+
+
+# Set by the middleware; sync endpoints see it through the threadpool's copied context
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def timed(operation: str):
+    """
+    Decorator recording a function's duration under crypto_operation_seconds.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                crypto_operation_duration.observe(time.perf_counter() - start, operation)
+        return wrapper
+    return decorator
+
+
+# =========================
+# SQLAlchemy hooks
+# =========================
+def instrument_engine(engine: Engine):
+    """
+    Times every statement and pool checkout on `engine`, and attributes
+    statements to the request that ran them.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_query_duration.observe(elapsed)
+
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            if stats.statements is not None:
+                stats.statements.append((elapsed, statement))
+
+    # The pool has no "before checkout" event; wrap connect() to include queueing
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return connect(*args, **kwargs)
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+
+
+# =========================
+# ASGI middleware
+# =========================
+class MetricsMiddleware:
+    """
+    Records latency, query count and DB time per route template
+    (e.g. /api/tickets/{ticket_id}), and logs requests slower than
+    SLOW_REQUEST_MS together with the SQL they ran.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(keep_statements=SLOW_REQUEST_MS > 0)
+        token = current_request.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+
+            http_request_duration.observe(elapsed, scope["method"], path, str(status[0]))
+            db_queries_per_request.observe(stats.queries, path)
+            db_time_per_request.observe(stats.db_time, path)
+
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                _log_slow_request(scope, path, status[0], elapsed, stats)
+
+
+def _log_slow_request(scope, path: str, status: int, elapsed: float, stats: RequestStats):
+    statements = "\n".join(
+        f"  {duration * 1000:8.2f} ms  {' '.join(sql.split())[:500]}"
+        for duration, sql in stats.statements or []
+    )
+    logger.warning(
+        "Slow request %s %s (%s) status=%s %.1f ms, %d queries, %.1f ms in DB%s",
+        scope["method"], scope["path"], path, status, elapsed * 1000,
+        stats.queries, stats.db_time * 1000, "\n" + statements if statements else "",
+    )
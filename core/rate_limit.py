@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from starlette.requests import Request
+
+from core.config import TRUST_PROXY_HEADERS, TRUSTED_PROXY_HOPS
+
+
+def client_ip(request: Request) -> str:
+    """
+    With TRUST_PROXY_HEADERS, the X-Forwarded-For entry added by the
+    outermost trusted proxy (TRUSTED_PROXY_HOPS from the right). Entries
+    left of it are written by the client and can change every request.
+    """
+    if TRUST_PROXY_HEADERS and TRUSTED_PROXY_HOPS > 0:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+        forwarded = [entry for entry in forwarded if entry]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token bucket: `capacity` requests in a burst, refilled at
+    `rate` tokens per second. Keeps at most `max_keys` buckets (LRU).
+    """
+
+    def __init__(self, rate: float, capacity: int, max_keys: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Takes one token. Returns 0 if allowed, otherwise the number of
+        seconds until a token is available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class FailureBackoff:
+    """
+    Exponential lockout after failed attempts: base * 2**(n-1) seconds,
+    capped at `max_delay`. Cleared on success.
+    """
+
+    def __init__(self, base: float, max_delay: float, max_keys: int = 10000):
+        self.base = base
+        self.max_delay = max_delay
+        self.max_keys = max_keys
+        self._state: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def locked_for(self, key: Hashable) -> float:
+        with self._lock:
+            _, locked_until = self._state.get(key, (0, 0.0))
+        return max(0.0, locked_until - time.monotonic())
+
+    def failure(self, key: Hashable):
+        with self._lock:
+            failures, _ = self._state.pop(key, (0, 0.0))
+            failures += 1
+            delay = min(self.max_delay, self.base * 2 ** (failures - 1))
+            self._state[key] = (failures, time.monotonic() + delay)
+            while len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+
+    def success(self, key: Hashable):
+        with self._lock:
+            self._state.pop(key, None)
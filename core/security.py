@@ -1,7 +1,28 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import jwt
-from core.config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRE_MINUTES
+from typing import Callable, Dict, Optional, Set, Tuple
+from core.cache import TTLCache
+from core.metrics import timed
+from core.config import (
+    JWT_SECRET,
+    JWT_ALGORITHM,
+    JWT_EXPIRE_MINUTES,
+    BCRYPT_WORKERS,
+    TOKEN_CACHE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# bcrypt is deliberately slow; keep it off the event loop and out of the
+# shared request threadpool so login bursts cannot starve scans/webhooks
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
 
 # =========================
 # Password Hashing
@@ -9,21 +30,114 @@ from core.config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRE_MINUTES
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
 
+@timed("password_verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _bcrypt_executor, verify_password, plain_password, hashed_password
+    )
+
 
 # =========================
 # JWT
 # =========================
-def create_access_token() -> str:
+def _jwt():
+    # PyJWT loads the cryptography backends on import (~0.1 s);
+    # defer that from app startup to the first token operation
+    import jwt
+    return jwt
+
+
+def create_access_token(
+    subject: str = "super_admin",
+    expires_minutes: int = JWT_EXPIRE_MINUTES,
+    device_id: Optional[str] = None,
+) -> str:
     payload = {
-        "sub": "super_admin",
-        "exp": datetime.utcnow() + timedelta(minutes=JWT_EXPIRE_MINUTES),
+        "sub": subject,
+        "exp": datetime.utcnow() + timedelta(minutes=expires_minutes),
         "iat": datetime.utcnow(),
+        "jti": uuid.uuid4().hex,
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    if device_id:
+        payload["device"] = device_id
+    return _jwt().encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
 def decode_access_token(token: str) -> dict:
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    return _jwt().decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+
+# Verified claims keyed by sha256(token); each entry expires with the token
+verified_tokens = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+
+
+@timed("jwt_verify")
+def verify_access_token(token: str) -> dict:
+    """
+    decode_access_token with a cache: a token that has already been
+    verified skips the HMAC check and claims parsing until its `exp`.
+    Raises jwt.PyJWTError for invalid tokens.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = verified_tokens.get(key)
+    if claims is None:
+        claims = decode_access_token(token)
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            verified_tokens.set(key, claims, ttl)
+    return claims
+
+
+# =========================
+# Revocation
+# =========================
+class TokenRevocations:
+    """
+    In-memory view of revoked token ids and devices, refreshed from the
+    database every `refresh_interval` seconds so revocations made on one
+    worker reach the others.
+    `loader` returns (revoked jtis, {device_id: revoked_at unix time}).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Tuple[Set[str], Dict[str, float]]],
+        refresh_interval: float,
+    ):
+        self.loader = loader
+        self.refresh_interval = refresh_interval
+        self._jtis: Set[str] = set()
+        self._devices: Dict[str, float] = {}
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh_if_stale(self):
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        with self._lock:
+            if now < self._next_refresh:
+                return
+            try:
+                self._jtis, self._devices = self.loader()
+            except Exception:
+                # A database blip must not fail every authenticated request
+                logger.exception("Token revocation refresh failed; keeping the last known list")
+            self._next_refresh = now + self.refresh_interval
+
+    def is_revoked(self, claims: dict) -> bool:
+        self._refresh_if_stale()
+        if claims.get("jti") in self._jtis:
+            return True
+        device = claims.get("device")
+        return device in self._devices and claims.get("iat", 0) <= self._devices[device]
+
+    def add_token(self, jti: str):
+        self._jtis = self._jtis | {jti}
+
+    def add_device(self, device_id: str, revoked_at: float):
+        self._devices = {**self._devices, device_id: revoked_at}
@@ -1,5 +1,10 @@
 from sqlalchemy.orm import Session
 from models.admin import Admin
+from core.cache import TTLCache
+from core.config import ADMIN_CACHE_TTL
+
+# Login only needs the password hash; avoid a query per attempt
+admin_cache = TTLCache(maxsize=1, ttl=ADMIN_CACHE_TTL)
 
 
 # =========================
@@ -13,6 +18,17 @@ def get_admin(db: Session) -> Admin | None:
     return db.query(Admin).filter(Admin.is_active == True).first()
 
 
+def get_admin_password_hash(db: Session) -> str | None:
+    """
+    Cached password hash of the active super admin.
+    """
+    def load():
+        admin = get_admin(db)
+        return admin.password_hash if admin else None
+
+    return admin_cache.get_or_set("password_hash", load)
+
+
 # =========================
 # Create (one-time use)
 # =========================
@@ -24,4 +40,5 @@ def create_admin(db: Session, admin_id: str, password_hash: str) -> Admin:
     db.add(admin)
     db.commit()
     db.refresh(admin)
+    admin_cache.clear()
     return admin
@@ -0,0 +1,241 @@
+import secrets
+from datetime import timedelta
+from sqlalchemy import select, update, delete, case, exists, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.capacity import CapacityCounter, SeatHold
+from models.event import Event
+from crud.event import get_event_settings, get_event_settings_async
+from core.config import CURRENT_EVENT
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from utils.timestamps import utcnow
+
+# Each event has a counter row named after its id; capacity and the
+# open/closed state live on the events row
+
+
+# =========================
+# Counter
+# =========================
+def reserve_seats(db: Session, seats: int, event_id: str = CURRENT_EVENT, require_open: bool = True) -> bool:
+    """
+    Adds `seats` to the event's counter only if sales are open and that
+    stays within the event's capacity (capacity <= 0 means unlimited).
+    Admin sales pass require_open=False: closing online sales does not
+    stop them, only capacity does. The conditional UPDATE row-locks the
+    counter, so concurrent checkouts cannot both take the last seat.
+    Caller commits.
+    """
+    if seats <= 0:
+        return True
+    event_matches = [
+        Event.id == event_id,
+        or_(Event.capacity <= 0, CapacityCounter.reserved + seats <= Event.capacity),
+    ]
+    if require_open:
+        event_matches.append(Event.is_open == True)
+    result = db.execute(
+        update(CapacityCounter)
+        .where(
+            CapacityCounter.name == event_id,
+            exists().where(*event_matches),
+        )
+        .values(reserved=CapacityCounter.reserved + seats)
+        .returning(CapacityCounter.reserved)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
+
+
+def release_seats(db: Session, seats: int, event_id: str = CURRENT_EVENT):
+    """
+    Gives seats back (expired hold, deleted ticket). Caller commits.
+    """
+    if seats <= 0:
+        return
+    db.execute(
+        update(CapacityCounter)
+        .where(CapacityCounter.name == event_id)
+        .values(reserved=case(
+            (CapacityCounter.reserved > seats, CapacityCounter.reserved - seats),
+            else_=0,
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _seats_remaining(reserved: Optional[int], capacity: int) -> Optional[int]:
+    if capacity <= 0:
+        return None
+    return max(capacity - (reserved or 0), 0)
+
+
+def get_seats_remaining(db: Session, event_id: str = CURRENT_EVENT) -> Optional[int]:
+    """
+    Seats left to sell, or None when capacity is unlimited.
+    Reads the counter row only (event settings are cached).
+    """
+    event = get_event_settings(db, event_id)
+    if event is None or event.capacity <= 0:
+        return None
+    reserved = db.scalar(
+        select(CapacityCounter.reserved).where(CapacityCounter.name == event_id)
+    )
+    return _seats_remaining(reserved, event.capacity)
+
+
+async def get_seats_remaining_async(db: AsyncSession, event_id: str = CURRENT_EVENT) -> Optional[int]:
+    event = await get_event_settings_async(db, event_id)
+    if event is None or event.capacity <= 0:
+        return None
+    reserved = await db.scalar(
+        select(CapacityCounter.reserved).where(CapacityCounter.name == event_id)
+    )
+    return _seats_remaining(reserved, event.capacity)
+
+
+# =========================
+# Seat holds
+# =========================
+def release_expired_holds(db: Session) -> int:
+    """
+    Deletes holds past expires_at and returns their seats to each hold's
+    event counter. Uses the expires_at index, so it is cheap to run on
+    every new hold. Caller commits.
+    """
+    released = Counter()
+    for event_id, seats in db.execute(
+        delete(SeatHold)
+        .where(SeatHold.expires_at <= utcnow())
+        .returning(SeatHold.event_id, SeatHold.seats)
+        .execution_options(synchronize_session=False)
+    ):
+        released[event_id] += seats
+    for event_id, seats in released.items():
+        release_seats(db, seats, event_id)
+    return sum(released.values())
+
+
+def get_hold_events(db: Session, tx_refs: Iterable[str]) -> Dict[str, str]:
+    """
+    tx_ref -> event id for the orders that have a seat hold, so payments
+    are issued for the event the buyer held seats in.
+    """
+    tx_refs = list(tx_refs)
+    if not tx_refs:
+        return {}
+    return dict(db.execute(
+        select(SeatHold.tx_ref, SeatHold.event_id).where(SeatHold.tx_ref.in_(tx_refs))
+    ).all())
+
+
+def count_open_holds(db: Session, client_ip: str) -> int:
+    return db.scalar(
+        select(func.count())
+        .select_from(SeatHold)
+        .where(SeatHold.client_ip == client_ip, SeatHold.expires_at > utcnow())
+    )
+
+
+def place_seat_hold(db: Session, tx_ref: str, seats: int, minutes: int,
+                    client_ip: Optional[str] = None, max_open_holds: int = 0,
+                    event_id: str = CURRENT_EVENT):
+    """
+    Holds `seats` for a checkout. Returns (hold, None), or (None, reason)
+    with reason "sold_out" (or sales closed), "held_elsewhere" (the tx_ref
+    is held by another client) or "too_many_holds" (the client already
+    has `max_open_holds` live holds; 0 = no limit).
+    Repeating the call from the same client returns the existing hold.
+    Caller commits; a concurrent first hold for the same tx_ref rolls
+    the session back.
+    """
+    release_expired_holds(db)
+
+    existing = db.get(SeatHold, tx_ref)
+    if existing:
+        return _existing_hold(existing, client_ip)
+
+    if max_open_holds > 0 and client_ip and count_open_holds(db, client_ip) >= max_open_holds:
+        return None, "too_many_holds"
+
+    if not reserve_seats(db, seats, event_id):
+        return None, "sold_out"
+
+    hold = SeatHold(
+        tx_ref=tx_ref,
+        event_id=event_id,
+        seats=seats,
+        expires_at=utcnow() + timedelta(minutes=minutes),
+        release_token=secrets.token_urlsafe(24),
+        client_ip=client_ip,
+    )
+    db.add(hold)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Another request inserted this tx_ref first; the rollback also
+        # gives back the seats reserved above
+        db.rollback()
+        existing = db.get(SeatHold, tx_ref)
+        if existing is None:
+            return None, "held_elsewhere"
+        return _existing_hold(existing, client_ip)
+    return hold, None
+
+
+def _existing_hold(hold: SeatHold, client_ip: Optional[str]):
+    if hold.client_ip != client_ip:
+        return None, "held_elsewhere"
+    return hold, None
+
+
+def cancel_seat_hold(db: Session, tx_ref: str, release_token: str) -> bool:
+    """
+    Releases a hold early (checkout abandoned). Only the holder knows
+    `release_token`. Caller commits.
+    """
+    row = db.execute(
+        delete(SeatHold)
+        .where(
+            SeatHold.tx_ref == tx_ref,
+            SeatHold.release_token.isnot(None),
+            SeatHold.release_token == release_token,
+        )
+        .returning(SeatHold.event_id, SeatHold.seats)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return False
+    release_seats(db, row.seats, row.event_id)
+    return True
+
+
+def convert_seat_hold(db: Session, tx_ref: str, seats: int, event_id: str = CURRENT_EVENT,
+                      require_open: bool = True) -> bool:
+    """
+    Turns the hold for a paid order into `seats` issued tickets of
+    `event_id` (see get_hold_events). Seats already held are kept (even
+    if the hold has just expired but was not swept yet); any difference
+    is reserved or released. Without a hold for that event the seats are
+    reserved directly (see reserve_seats for require_open). Returns False
+    when the order cannot fit, in which case nothing stays reserved for
+    it. Caller commits.
+    """
+    held = db.scalar(
+        delete(SeatHold)
+        .where(SeatHold.tx_ref == tx_ref, SeatHold.event_id == event_id)
+        .returning(SeatHold.seats)
+        .execution_options(synchronize_session=False)
+    ) or 0
+
+    if seats <= held:
+        release_seats(db, held - seats, event_id)
+        return True
+
+    if reserve_seats(db, seats - held, event_id, require_open):
+        return True
+
+    release_seats(db, held, event_id)
+    return False
@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.event import Event
+from models.capacity import CapacityCounter
+from core.cache import TTLCache
+from core.config import CURRENT_EVENT, EVENT_CACHE_TTL
+from database.partitions import tickets_partitioned, create_ticket_partition, detach_ticket_partition
+from typing import List, Optional
+
+# Price / capacity / open state read on every availability check and sale
+event_cache = TTLCache(maxsize=32, ttl=EVENT_CACHE_TTL)
+
+SETTINGS_COLUMNS = (Event.id, Event.name, Event.price, Event.capacity, Event.is_open)
+
+
+# =========================
+# Read
+# =========================
+def get_event(db: Session, event_id: str) -> Optional[Event]:
+    return db.get(Event, event_id)
+
+
+def list_events(db: Session) -> List[Event]:
+    return db.query(Event).order_by(Event.created_at.desc()).all()
+
+
+def get_event_settings(db: Session, event_id: str = CURRENT_EVENT):
+    """
+    Cached (id, name, price, capacity, is_open) row, or None.
+    """
+    return event_cache.get_or_set(
+        event_id,
+        lambda: db.execute(select(*SETTINGS_COLUMNS).where(Event.id == event_id)).first(),
+    )
+
+
+async def get_event_settings_async(db: AsyncSession, event_id: str = CURRENT_EVENT):
+    settings = event_cache.get(event_id)
+    if settings is None:
+        settings = (await db.execute(select(*SETTINGS_COLUMNS).where(Event.id == event_id))).first()
+        event_cache.set(event_id, settings)
+    return settings
+
+
+# =========================
+# Create / update
+# =========================
+def create_event(db: Session, event_data: dict) -> Event:
+    """
+    Adds the event with an empty capacity counter and, when tickets
+    are partitioned, its partition. Caller commits.
+    """
+    event = Event(**event_data)
+    db.add(event)
+    db.add(CapacityCounter(name=event.id, reserved=0))
+    db.flush()
+
+    conn = db.connection()
+    if tickets_partitioned(conn):
+        create_ticket_partition(conn, event.id)
+
+    event_cache.invalidate(event.id)
+    return event
+
+
+def update_event(db: Session, event: Event, changes: dict) -> Event:
+    """
+    Caller commits.
+    """
+    for name, value in changes.items():
+        setattr(event, name, value)
+    db.flush()
+    event_cache.invalidate(event.id)
+    return event
+
+
+def archive_event(db: Session, event: Event) -> Optional[str]:
+    """
+    Closes the event and, when tickets are partitioned, detaches its
+    partition in one statement. Returns the detached table's name
+    (None when unpartitioned: the rows stay, scoped out by event_id).
+    Caller commits.
+    """
+    conn = db.connection()
+    detached = detach_ticket_partition(conn, event.id) if tickets_partitioned(conn) else None
+
+    event.is_open = False
+    event.archived_at = datetime.now(timezone.utc)
+    db.flush()
+    event_cache.invalidate(event.id)
+    return detached
@@ -0,0 +1,68 @@
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models.order import Order
+from typing import Iterable, List, Set
+
+
+def _insert(db: Session):
+    """
+    Dialect-specific insert() that supports ON CONFLICT.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+# =========================
+# Create
+# =========================
+def create_order_if_new(db: Session, order_data: dict) -> bool:
+    """
+    INSERT ... ON CONFLICT DO NOTHING on the order key.
+    Returns True only for the call that created the order; replays
+    (webhook retries, repeated manual submissions) get False.
+    Concurrent inserts of the same tx_ref wait on the unique index, so
+    exactly one caller wins. Caller commits.
+    """
+    result = db.execute(
+        _insert(db)(Order)
+        .values(**order_data)
+        .on_conflict_do_nothing()
+        .returning(Order.tx_ref)
+    )
+    return result.first() is not None
+
+
+def create_orders_if_new(db: Session, orders_data: List[dict]) -> Set[str]:
+    """
+    Multi-row variant of create_order_if_new for bulk imports.
+    Returns the tx_refs that were created; the rest already existed.
+    All dicts must have the same keys. Caller commits.
+    """
+    if not orders_data:
+        return set()
+    result = db.execute(
+        _insert(db)(Order)
+        .values(orders_data)
+        .on_conflict_do_nothing()
+        .returning(Order.tx_ref)
+    )
+    return set(result.scalars())
+
+
+# =========================
+# Delete
+# =========================
+def delete_orders(db: Session, tx_refs: Iterable[str]):
+    """
+    Drops order rows that ended up without tickets (e.g. sold out during
+    an import), so a later re-run can create them. Caller commits.
+    """
+    tx_refs = list(tx_refs)
+    if tx_refs:
+        db.execute(
+            delete(Order)
+            .where(Order.tx_ref.in_(tx_refs))
+            .execution_options(synchronize_session=False)
+        )
@@ -1,75 +1,331 @@
+import base64
+import json
+from datetime import datetime, timezone
+from sqlalchemy import insert, select, update, case, func, literal, or_, tuple_
 from sqlalchemy.orm import Session
 from models.ticket import Ticket
-from typing import List, Optional
+from core.cache import TTLCache
+from core.config import STATS_CACHE_TTL, ORDER_CACHE_SIZE, ORDER_CACHE_TTL, CURRENT_EVENT
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Columns the admin listing can filter on (exact match)
+TICKET_FILTER_COLUMNS = ("department", "level", "gender", "payment_status")
+
+# Dashboard aggregates per event; cleared after the commit that creates, checks
+# in or deletes tickets (by the caller when a function here does not commit)
+stats_cache = TTLCache(maxsize=8, ttl=STATS_CACHE_TTL)
+
+# Serialized GET /by-tx-ref responses keyed by tx_ref: (etag, body), or None
+# while the order has no tickets. Dropped after a commit that changes them.
+order_cache = TTLCache(maxsize=ORDER_CACHE_SIZE, ttl=ORDER_CACHE_TTL)
 
 
 # =========================
 # Create
 # =========================
-def create_ticket(db: Session, ticket_data: dict) -> Ticket:
-    ticket = Ticket(**ticket_data)
-    db.add(ticket)
-    db.flush()              # ensures ID is written
-    db.refresh(ticket)      # loads autogenerated fields (purchase_date)
-    return ticket
+def create_tickets_bulk(db: Session, tickets_data: List[dict]) -> List[Ticket]:
+    """
+    Inserts all tickets of an order in one multi-row INSERT ... RETURNING.
+    Server defaults (purchase_date) come back in the same statement,
+    so no per-ticket flush/refresh round trips are needed.
+    """
+    if not tickets_data:
+        return []
+    tickets = list(
+        db.scalars(
+            insert(Ticket).returning(Ticket, sort_by_parameter_order=True),
+            tickets_data,
+        )
+    )
+    return tickets
+
+
+def insert_tickets(db: Session, tickets_data: List[dict]) -> int:
+    """
+    Bulk path for imports: no RETURNING and no ORM objects. SQLAlchemy
+    sends the rows as batched multi-row INSERTs (insertmanyvalues).
+    """
+    if not tickets_data:
+        return 0
+    db.execute(insert(Ticket), tickets_data)
+    return len(tickets_data)
 
 
 # =========================
 # Read
 # =========================
-def get_ticket_by_id(db: Session, ticket_id: str) -> Optional[Ticket]:
-    return db.query(Ticket).filter(Ticket.id == ticket_id).first()
+def get_ticket_by_id(db: Session, ticket_id: str, event_id: Optional[str] = None) -> Optional[Ticket]:
+    query = db.query(Ticket).filter(Ticket.id == ticket_id)
+    if event_id is not None:
+        query = query.filter(Ticket.event_id == event_id)
+    return query.first()
 
 
-def get_ticket_by_email(db: Session, email: str) -> Optional[Ticket]:
-    return db.query(Ticket).filter(Ticket.email == email).first()
+def contact_conflict_statement(email: str, phone: str, event_id: str = CURRENT_EVENT):
+    """
+    One query answering "is the email used?" and "is the phone used?"
+    for this event. The OR is served by the (event_id, email) and
+    (event_id, phone) indexes (bitmap OR on Postgres) and only
+    aggregates the few matching rows.
+    """
+    return select(
+        func.max(case((Ticket.email == email, 1), else_=0)),
+        func.max(case((Ticket.phone == phone, 1), else_=0)),
+    ).where(Ticket.event_id == event_id, or_(Ticket.email == email, Ticket.phone == phone))
+
+
+def contact_conflict_reason(row) -> Optional[str]:
+    email_used, phone_used = row if row else (None, None)
+    if email_used:
+        return "email_already_used"
+    if phone_used:
+        return "phone_already_used"
+    return None
 
 
-def get_ticket_by_phone(db: Session, phone: str) -> Optional[Ticket]:
-    return db.query(Ticket).filter(Ticket.phone == phone).first()
+def find_contact_conflict(db: Session, email: str, phone: str) -> Optional[str]:
+    """
+    Returns "email_already_used", "phone_already_used" or None.
+    """
+    return contact_conflict_reason(db.execute(contact_conflict_statement(email, phone)).first())
 
 
 def get_tickets_by_original_tx_ref(db: Session, tx_ref: str) -> List[Ticket]:
     """
     Fetch ALL tickets created from the same transaction.
-    Matches tx_ref-ticketId pattern.
     """
     return (
         db.query(Ticket)
-        .filter(Ticket.tx_ref.like(f"{tx_ref}%"))
+        .filter(Ticket.original_tx_ref == tx_ref)
         .order_by(Ticket.purchase_date.asc())
         .all()
     )
 
 
-def transaction_already_processed(db: Session, tx_ref: str) -> bool:
-    """
-    Used to prevent duplicate ticket creation.
-    """
+def get_all_tickets(db: Session, event_id: str = CURRENT_EVENT) -> List[Ticket]:
     return (
         db.query(Ticket)
-        .filter(Ticket.tx_ref.like(f"{tx_ref}%"))
-        .first()
-        is not None
+        .filter(Ticket.event_id == event_id)
+        .order_by(Ticket.purchase_date.desc())
+        .all()
     )
 
 
-def get_all_tickets(db: Session) -> List[Ticket]:
+# =========================
+# Admin listing
+# =========================
+def encode_cursor(purchase_date: datetime, ticket_id: str) -> str:
+    raw = json.dumps([purchase_date.isoformat(), ticket_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        purchase_date, ticket_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(purchase_date), ticket_id
+    except (TypeError, ValueError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _listing_query(db: Session, filters: Optional[dict], columns: Optional[Sequence] = None):
+    """
+    Always scoped to one event: filters["event_id"], else CURRENT_EVENT.
+    """
+    query = db.query(*columns) if columns else db.query(Ticket)
+    query = query.filter(Ticket.event_id == ((filters or {}).get("event_id") or CURRENT_EVENT))
+
+    for name, value in (filters or {}).items():
+        if value is None:
+            continue
+        if name == "checked_in":
+            query = query.filter(Ticket.is_checked_in == value)
+        elif name in TICKET_FILTER_COLUMNS:
+            query = query.filter(getattr(Ticket, name) == value)
+
+    return query.order_by(Ticket.purchase_date.desc(), Ticket.id.desc())
+
+
+def list_tickets(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    filters: Optional[dict] = None,
+    columns: Optional[Sequence] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Keyset page of tickets, newest first, ordered by (purchase_date, id).
+    Pass `columns` to fetch a projection instead of full ORM objects.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if columns:
+        # The cursor is built from these two, so always select them
+        columns = [Ticket.purchase_date, Ticket.id] + [
+            c for c in columns if c not in (Ticket.purchase_date, Ticket.id)
+        ]
+
+    query = _listing_query(db, filters, columns)
+
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Ticket.purchase_date, Ticket.id)
+            < tuple_(literal(after_date, Ticket.purchase_date.type), after_id)
+        )
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.purchase_date, last.id)
+
+
+def iter_tickets(
+    db: Session,
+    columns: Sequence,
+    filters: Optional[dict] = None,
+    batch_size: int = 1000,
+) -> Iterator[tuple]:
+    """
+    Streams matching rows from a server-side cursor (stream_results on
+    Postgres) so exports never hold the whole table in memory.
+    """
+    query = _listing_query(db, filters, columns).execution_options(yield_per=batch_size)
+    yield from query
+
+
+def get_ticket_manifest(db: Session, event_id: str = CURRENT_EVENT) -> List[tuple]:
+    """
+    Minimal (id, qr_data, is_checked_in) rows for offline scanners.
+    Skips ORM object construction for the whole event.
+    """
     return (
-        db.query(Ticket)
-        .order_by(Ticket.purchase_date.desc())
+        db.query(Ticket.id, Ticket.qr_data, Ticket.is_checked_in)
+        .filter(Ticket.event_id == event_id)
+        .order_by(Ticket.id.asc())
         .all()
     )
 
 
+def get_existing_ticket_ids(db: Session, ticket_ids: Iterable[str], event_id: str = CURRENT_EVENT) -> Set[str]:
+    ids = list(ticket_ids)
+    if not ids:
+        return set()
+    return {
+        row.id
+        for row in db.query(Ticket.id).filter(Ticket.event_id == event_id, Ticket.id.in_(ids))
+    }
+
+
+# =========================
+# Dashboard stats
+# =========================
+def _compute_ticket_stats(db: Session, event_id: str) -> dict:
+    checked_in = func.sum(case((Ticket.is_checked_in == True, 1), else_=0))
+    in_event = Ticket.event_id == event_id
+
+    sold, checked, revenue = db.query(
+        func.count(Ticket.id), checked_in, func.sum(Ticket.price)
+    ).filter(in_event).one()
+
+    def breakdown(column):
+        return [
+            {"name": name, "sold": count, "checked_in": int(checked or 0)}
+            for name, count, checked in (
+                db.query(column, func.count(Ticket.id), checked_in)
+                .filter(in_event)
+                .group_by(column)
+                .order_by(column)
+            )
+        ]
+
+    return {
+        "sold": sold,
+        "checked_in": int(checked or 0),
+        "revenue": revenue or 0,
+        "by_department": breakdown(Ticket.department),
+        "by_level": breakdown(Ticket.level),
+        "generated_at": datetime.now(timezone.utc),
+    }
+
+
+def get_ticket_stats(db: Session, event_id: str = CURRENT_EVENT) -> dict:
+    """
+    Sold / checked-in / revenue totals plus per-department and per-level
+    breakdowns for one event, computed with GROUP BY and cached for
+    STATS_CACHE_TTL seconds.
+    """
+    return stats_cache.get_or_set(("stats", event_id), lambda: _compute_ticket_stats(db, event_id))
+
+
 # =========================
 # Update
 # =========================
-def mark_ticket_checked_in(db: Session, ticket: Ticket) -> Ticket:
-    ticket.is_checked_in = True
+def check_in_statement(ticket_id: str, gate_id: Optional[str] = None, event_id: str = CURRENT_EVENT):
+    """
+    Conditional UPDATE ... RETURNING shared by the sync and async paths.
+    Tickets of other events never match (and their partitions are pruned).
+    """
+    return (
+        update(Ticket)
+        .where(Ticket.event_id == event_id, Ticket.id == ticket_id, Ticket.is_checked_in == False)
+        .values(is_checked_in=True, checked_in_at=func.now(), checked_in_by=gate_id)
+        .returning(Ticket.id, Ticket.full_name, Ticket.checked_in_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def check_in_batch_statement(scans: Dict[str, datetime], gate_id: Optional[str] = None,
+                             event_id: str = CURRENT_EVENT):
+    """
+    check_in_statement for many tickets at once, each keeping its own
+    scan time (`scans` maps ticket id -> scanned at). Returns the ids flipped.
+    """
+    return (
+        update(Ticket)
+        .where(Ticket.event_id == event_id, Ticket.id.in_(list(scans)), Ticket.is_checked_in == False)
+        .values(
+            is_checked_in=True,
+            checked_in_at=case(scans, value=Ticket.id),
+            checked_in_by=gate_id,
+        )
+        .returning(Ticket.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def mark_ticket_checked_in(db: Session, ticket_id: str, gate_id: Optional[str] = None):
+    """
+    Atomically checks in a ticket with one conditional UPDATE ... RETURNING.
+    Returns the (id, full_name, checked_in_at) row, or None when the
+    ticket does not exist or was already checked in (e.g. by another gate).
+    """
+    row = db.execute(check_in_statement(ticket_id, gate_id)).first()
     db.commit()
-    db.refresh(ticket)
-    return ticket
+    if row:
+        stats_cache.clear()
+    return row
+
+
+def check_in_tickets(
+    db: Session,
+    scans: Dict[str, datetime],
+    gate_id: Optional[str] = None,
+) -> Set[str]:
+    """
+    Checks in many tickets of the current event with one conditional
+    UPDATE, keeping each ticket's own scan time. Returns the ids that
+    were actually flipped; tickets already checked in are left
+    untouched. Caller commits.
+    """
+    if not scans:
+        return set()
+    return set(db.execute(check_in_batch_statement(scans, gate_id)).scalars())
 
 
 # =========================
@@ -78,3 +334,5 @@ def mark_ticket_checked_in(db: Session, ticket: Ticket) -> Ticket:
 def delete_ticket(db: Session, ticket: Ticket):
     db.delete(ticket)
     db.commit()
+    stats_cache.clear()
+    order_cache.invalidate(ticket.original_tx_ref)
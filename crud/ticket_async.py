@@ -0,0 +1,49 @@
+"""
+AsyncSession versions of the crud.ticket functions used by the DB_ASYNC
+endpoints. Statements come from the sync module, so both paths match.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.ticket import Ticket
+from crud.ticket import (
+    stats_cache,
+    check_in_statement,
+    contact_conflict_statement,
+    contact_conflict_reason,
+)
+from typing import List, Optional
+
+
+# =========================
+# Read
+# =========================
+async def get_ticket_by_id(db: AsyncSession, ticket_id: str, event_id: Optional[str] = None) -> Optional[Ticket]:
+    query = select(Ticket).where(Ticket.id == ticket_id)
+    if event_id is not None:
+        query = query.where(Ticket.event_id == event_id)
+    return await db.scalar(query)
+
+
+async def find_contact_conflict(db: AsyncSession, email: str, phone: str) -> Optional[str]:
+    row = (await db.execute(contact_conflict_statement(email, phone))).first()
+    return contact_conflict_reason(row)
+
+
+async def get_tickets_by_original_tx_ref(db: AsyncSession, tx_ref: str) -> List[Ticket]:
+    result = await db.scalars(
+        select(Ticket)
+        .where(Ticket.original_tx_ref == tx_ref)
+        .order_by(Ticket.purchase_date.asc())
+    )
+    return list(result)
+
+
+# =========================
+# Update
+# =========================
+async def mark_ticket_checked_in(db: AsyncSession, ticket_id: str, gate_id: Optional[str] = None):
+    row = (await db.execute(check_in_statement(ticket_id, gate_id))).first()
+    await db.commit()
+    if row:
+        stats_cache.clear()
+    return row
@@ -0,0 +1,60 @@
+from datetime import datetime
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from models.token_revocation import TokenRevocation
+from typing import Dict, Set, Tuple
+from utils.timestamps import utcnow, as_utc
+
+
+# =========================
+# Create
+# =========================
+def purge_expired_revocations(db: Session) -> int:
+    """
+    Drops rows whose tokens have all expired. Caller commits.
+    """
+    return db.execute(
+        delete(TokenRevocation)
+        .where(TokenRevocation.expires_at <= utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def revoke_token(db: Session, jti: str, expires_at: datetime):
+    purge_expired_revocations(db)
+    db.add(TokenRevocation(jti=jti, expires_at=expires_at))
+    db.commit()
+
+
+def revoke_device(db: Session, device_id: str, expires_at: datetime) -> datetime:
+    revoked_at = utcnow()
+    purge_expired_revocations(db)
+    db.add(TokenRevocation(device_id=device_id, expires_at=expires_at, created_at=revoked_at))
+    db.commit()
+    return revoked_at
+
+
+# =========================
+# Read
+# =========================
+def get_active_revocations(db: Session) -> Tuple[Set[str], Dict[str, float]]:
+    """
+    Returns (revoked jtis, {device_id: latest revocation unix time})
+    for revocations that can still affect an unexpired token.
+    """
+    jtis: Set[str] = set()
+    devices: Dict[str, float] = {}
+
+    rows = (
+        db.query(TokenRevocation.jti, TokenRevocation.device_id, TokenRevocation.created_at)
+        .filter(TokenRevocation.expires_at > utcnow())
+        .all()
+    )
+    for jti, device_id, created_at in rows:
+        if jti:
+            jtis.add(jti)
+        if device_id:
+            revoked_at = as_utc(created_at).timestamp()
+            devices[device_id] = max(devices.get(device_id, 0.0), revoked_at)
+
+    return jtis, devices
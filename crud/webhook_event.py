@@ -0,0 +1,146 @@
+from datetime import timedelta
+from sqlalchemy import update, case, func, or_, and_
+from sqlalchemy.orm import Session
+from models.webhook_event import WebhookEvent
+from typing import List, Optional
+from utils.timestamps import utcnow, as_utc
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+IGNORED = "ignored"
+SOLD_OUT = "sold_out"   # paid but over capacity; needs a refund
+FAILED = "failed"
+
+
+# =========================
+# Create
+# =========================
+def enqueue_webhook_event(
+    db: Session,
+    payload: str,
+    tx_ref: Optional[str] = None,
+    provider: str = "flutterwave",
+) -> WebhookEvent:
+    event = WebhookEvent(provider=provider, tx_ref=tx_ref, payload=payload, status=PENDING)
+    db.add(event)
+    db.commit()
+    return event
+
+
+# =========================
+# Claim / complete
+# =========================
+def claim_webhook_events(db: Session, limit: int, claim_timeout: int) -> List[WebhookEvent]:
+    """
+    Claims up to `limit` pending events for this worker.
+    Claims older than `claim_timeout` seconds (crashed worker) are retried.
+    On Postgres, SKIP LOCKED lets several workers claim concurrently.
+    """
+    now = utcnow()
+    claimable = or_(
+        WebhookEvent.status == PENDING,
+        and_(
+            WebhookEvent.status == PROCESSING,
+            WebhookEvent.claimed_at < now - timedelta(seconds=claim_timeout),
+        ),
+    )
+
+    ids = [
+        row.id
+        for row in db.query(WebhookEvent.id)
+        .filter(claimable)
+        .order_by(WebhookEvent.id.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ]
+    if not ids:
+        db.rollback()
+        return []
+
+    events = db.scalars(
+        update(WebhookEvent)
+        .where(WebhookEvent.id.in_(ids), claimable)
+        .values(status=PROCESSING, claimed_at=now, attempts=WebhookEvent.attempts + 1)
+        .returning(WebhookEvent)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return sorted(events, key=lambda e: e.id)
+
+
+def complete_webhook_event(db: Session, event_id: int, status: str = DONE):
+    """
+    Marks an event finished. Caller commits, so ticket creation and the
+    status change land in the same transaction.
+    """
+    db.execute(
+        update(WebhookEvent)
+        .where(WebhookEvent.id == event_id)
+        .values(status=status, processed_at=utcnow(), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def fail_webhook_event(db: Session, event_id: int, error: str, max_attempts: int):
+    """
+    Returns the event to the queue, or parks it as failed once it has
+    used up its attempts.
+    """
+    db.execute(
+        update(WebhookEvent)
+        .where(WebhookEvent.id == event_id)
+        .values(
+            status=case((WebhookEvent.attempts >= max_attempts, FAILED), else_=PENDING),
+            claimed_at=None,
+            last_error=error,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+# =========================
+# Metrics
+# =========================
+def get_webhook_inbox_stats(db: Session) -> dict:
+    """
+    Inbox depth per status and processing lag in seconds.
+    """
+    counts = dict(
+        db.query(WebhookEvent.status, func.count(WebhookEvent.id))
+        .group_by(WebhookEvent.status)
+        .all()
+    )
+
+    oldest_waiting = (
+        db.query(func.min(WebhookEvent.received_at))
+        .filter(WebhookEvent.status.in_([PENDING, PROCESSING]))
+        .scalar()
+    )
+
+    recent = (
+        db.query(WebhookEvent.received_at, WebhookEvent.processed_at)
+        .filter(WebhookEvent.processed_at.isnot(None))
+        .order_by(WebhookEvent.id.desc())
+        .limit(100)
+        .all()
+    )
+
+    now = utcnow()
+    lags = [
+        (as_utc(row.processed_at) - as_utc(row.received_at)).total_seconds()
+        for row in recent
+    ]
+
+    return {
+        "pending": counts.get(PENDING, 0),
+        "processing": counts.get(PROCESSING, 0),
+        "failed": counts.get(FAILED, 0),
+        "done": counts.get(DONE, 0) + counts.get(IGNORED, 0),
+        "sold_out": counts.get(SOLD_OUT, 0),
+        "oldest_pending_age_seconds": (
+            (now - as_utc(oldest_waiting)).total_seconds() if oldest_waiting else 0.0
+        ),
+        "avg_processing_lag_seconds": sum(lags) / len(lags) if lags else 0.0,
+    }
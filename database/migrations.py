@@ -0,0 +1,206 @@
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from core.config import CURRENT_EVENT, EVENT_CAPACITY, TICKETS_PARTITIONED
+from database.partitions import partition_tickets, tickets_partitioned, create_event_partitions
+from models.event import EVENT_ID_PATTERN
+from models.ticket import Ticket
+
+
+# =========================
+# Helpers
+# =========================
+def _columns(conn: Connection, table: str) -> dict:
+    return {col["name"]: col for col in inspect(conn).get_columns(table)}
+
+
+def _add_column_if_missing(conn: Connection, table: str, column: str, ddl: str):
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+# =========================
+# Migrations
+# =========================
+# Each migration is idempotent so it is safe to run on every deploy,
+# including against databases freshly built by create_all().
+def add_check_in_audit_columns(conn: Connection):
+    _add_column_if_missing(conn, "tickets", "checked_in_at", "TIMESTAMP WITH TIME ZONE")
+    _add_column_if_missing(conn, "tickets", "checked_in_by", "VARCHAR")
+
+
+def add_original_tx_ref(conn: Connection):
+    """
+    Stores the order reference in its own indexed column so lookups are
+    equality matches instead of `tx_ref LIKE 'ref%'` scans.
+    Backfills from the "{tx_ref}-{ticket_id}" format.
+    """
+    _add_column_if_missing(conn, "tickets", "original_tx_ref", "VARCHAR")
+    conn.execute(text(
+        "UPDATE tickets "
+        "SET original_tx_ref = substr(tx_ref, 1, length(tx_ref) - length(id) - 1) "
+        "WHERE original_tx_ref IS NULL AND tx_ref LIKE '%-' || id"
+    ))
+    # Anything not in the composite format is its own order reference
+    conn.execute(text(
+        "UPDATE tickets SET original_tx_ref = tx_ref WHERE original_tx_ref IS NULL"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_original_tx_ref "
+        "ON tickets (original_tx_ref)"
+    ))
+
+
+def backfill_orders(conn: Connection):
+    """
+    Creates an orders row for every tx_ref sold before the orders table
+    existed, so replays of old transactions are recognised.
+    """
+    conn.execute(text(
+        "INSERT INTO orders (tx_ref, email, phone, amount, currency, source, created_at) "
+        "SELECT original_tx_ref, MIN(email), MIN(phone), SUM(price), MIN(currency), "
+        "'backfill', MIN(purchase_date) "
+        "FROM tickets "
+        "WHERE original_tx_ref IS NOT NULL "
+        "AND original_tx_ref NOT IN (SELECT tx_ref FROM orders) "
+        "GROUP BY original_tx_ref"
+    ))
+
+
+def add_events(conn: Connection):
+    """
+    Creates CURRENT_EVENT and attaches everything sold before events
+    existed to it: tickets get its event_id and the old single capacity
+    counter ("tickets") becomes its counter.
+    """
+    if not re.match(EVENT_ID_PATTERN, CURRENT_EVENT):
+        raise RuntimeError("CURRENT_EVENT must be lowercase letters, digits and _")
+
+    params = {"event": CURRENT_EVENT, "capacity": EVENT_CAPACITY, "is_open": True}
+    conn.execute(text(
+        "INSERT INTO events (id, name, capacity, is_open, created_at) "
+        "SELECT :event, :event, :capacity, :is_open, CURRENT_TIMESTAMP "
+        "WHERE NOT EXISTS (SELECT 1 FROM events WHERE id = :event)"
+    ), params)
+
+    _add_column_if_missing(conn, "tickets", "event_id", "VARCHAR REFERENCES events (id)")
+    conn.execute(text("UPDATE tickets SET event_id = :event WHERE event_id IS NULL"), params)
+    if conn.dialect.name == "postgresql" and _columns(conn, "tickets")["event_id"]["nullable"]:
+        conn.execute(text("ALTER TABLE tickets ALTER COLUMN event_id SET NOT NULL"))
+
+    conn.execute(text(
+        "UPDATE capacity_counters SET name = :event "
+        "WHERE name = 'tickets' "
+        "AND NOT EXISTS (SELECT 1 FROM capacity_counters WHERE name = :event)"
+    ), params)
+
+
+def add_seat_hold_owner_columns(conn: Connection):
+    """
+    Holds placed before this have no release token; they can only expire.
+    """
+    _add_column_if_missing(conn, "seat_holds", "release_token", "VARCHAR")
+    _add_column_if_missing(conn, "seat_holds", "client_ip", "VARCHAR")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_seat_holds_client_ip ON seat_holds (client_ip)"
+    ))
+
+
+def add_hold_and_order_events(conn: Connection):
+    """
+    Seat holds and orders record the event they reserve seats for, so
+    changing CURRENT_EVENT never credits or debits another event's
+    counter. Old orders take their tickets' event; anything else
+    (including open holds) belonged to CURRENT_EVENT.
+    """
+    params = {"event": CURRENT_EVENT}
+    _add_column_if_missing(conn, "seat_holds", "event_id", "VARCHAR REFERENCES events (id)")
+    conn.execute(text("UPDATE seat_holds SET event_id = :event WHERE event_id IS NULL"), params)
+    if conn.dialect.name == "postgresql" and _columns(conn, "seat_holds")["event_id"]["nullable"]:
+        conn.execute(text("ALTER TABLE seat_holds ALTER COLUMN event_id SET NOT NULL"))
+
+    _add_column_if_missing(conn, "orders", "event_id", "VARCHAR REFERENCES events (id)")
+    conn.execute(text(
+        "UPDATE orders SET event_id = ("
+        "SELECT MIN(t.event_id) FROM tickets t WHERE t.original_tx_ref = orders.tx_ref"
+        ") WHERE event_id IS NULL"
+    ))
+    conn.execute(text("UPDATE orders SET event_id = :event WHERE event_id IS NULL"), params)
+
+
+def add_revocation_expiry_index(conn: Connection):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_token_revocations_expires_at "
+        "ON token_revocations (expires_at)"
+    ))
+
+
+def add_listing_index(conn: Connection):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tickets_event_purchase_date_id "
+        "ON tickets (event_id, purchase_date, id)"
+    ))
+    # Superseded by the event-led index above
+    conn.execute(text("DROP INDEX IF EXISTS ix_tickets_purchase_date_id"))
+
+
+def add_contact_indexes(conn: Connection):
+    """
+    Availability checks look tickets up by email and phone within an
+    event. Not unique: every ticket of a group order shares the buyer's
+    contact details.
+    """
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_event_email ON tickets (event_id, email)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tickets_event_phone ON tickets (event_id, phone)"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_tickets_email"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_tickets_phone"))
+
+
+def seed_capacity_counter(conn: Connection):
+    """
+    Starts each event's capacity counter at the number of its tickets
+    already sold. This is the only COUNT(*) over tickets; afterwards the
+    counter is maintained by holds, conversions and deletions.
+    """
+    conn.execute(text(
+        "INSERT INTO capacity_counters (name, reserved) "
+        "SELECT e.id, (SELECT COUNT(*) FROM tickets t WHERE t.event_id = e.id) "
+        "FROM events e "
+        "WHERE NOT EXISTS (SELECT 1 FROM capacity_counters c WHERE c.name = e.id)"
+    ))
+
+
+def partition_tickets_by_event(conn: Connection):
+    """
+    Opt-in (TICKETS_PARTITIONED=true, Postgres only); see
+    database.partitions.partition_tickets. On an already partitioned
+    table, adds the partitions of events created since (add_events
+    inserts CURRENT_EVENT without one).
+    """
+    if tickets_partitioned(conn):
+        create_event_partitions(conn)
+    elif TICKETS_PARTITIONED and conn.dialect.name == "postgresql":
+        partition_tickets(conn, Ticket.__table__.indexes)
+
+
+MIGRATIONS = [
+    add_check_in_audit_columns,
+    add_original_tx_ref,
+    backfill_orders,
+    add_events,
+    add_seat_hold_owner_columns,
+    add_hold_and_order_events,
+    add_revocation_expiry_index,
+    add_listing_index,
+    add_contact_indexes,
+    seed_capacity_counter,
+    partition_tickets_by_event,
+]
+
+
+def run_migrations(engine: Engine):
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
@@ -0,0 +1,94 @@
+"""
+Postgres list partitioning of tickets by event_id.
+
+Each event's tickets live in their own table, tickets_<event id>, so
+event-scoped queries only read that partition and a finished event can
+be archived with a single DETACH PARTITION.
+"""
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from models.event import EVENT_ID_PATTERN
+
+
+def partition_name(event_id: str) -> str:
+    # Event ids are validated against EVENT_ID_PATTERN, so they are safe
+    # to use as identifiers and literals below
+    if not re.match(EVENT_ID_PATTERN, event_id):
+        raise ValueError(f"Invalid event id: {event_id!r}")
+    return f"tickets_{event_id}"
+
+
+def tickets_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'tickets'::regclass"
+    )).first() is not None
+
+
+def create_ticket_partition(conn: Connection, event_id: str, parent: str = "tickets"):
+    name = partition_name(event_id)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} FOR VALUES IN ('{event_id}')"
+    ))
+
+
+def create_event_partitions(conn: Connection, parent: str = "tickets"):
+    """
+    Ensures every event has its partition, e.g. for events inserted by
+    migrations rather than crud.event.create_event.
+    """
+    for (event_id,) in conn.execute(text("SELECT id FROM events")).all():
+        create_ticket_partition(conn, event_id, parent)
+
+
+def detach_ticket_partition(conn: Connection, event_id: str) -> str:
+    """
+    Detaches the event's partition; its rows stay in the standalone
+    table (returned) for export or DROP. Takes a brief exclusive lock.
+    """
+    name = partition_name(event_id)
+    conn.execute(text(f"ALTER TABLE tickets DETACH PARTITION {name}"))
+    return name
+
+
+def partition_tickets(conn: Connection, indexes) -> bool:
+    """
+    Rebuilds tickets as a table partitioned by LIST (event_id), with one
+    partition per event, and copies every row across. Runs inside the
+    migration transaction and locks tickets while copying, so run it in
+    a quiet window. `indexes` are the model's indexes, recreated on the
+    parent (and so on every partition). Returns False if already done
+    (see create_event_partitions).
+
+    Postgres requires the partition key in every unique constraint, so
+    the primary key becomes (event_id, id) and qr_data is unique per event.
+    """
+    if tickets_partitioned(conn):
+        return False
+
+    conn.execute(text(
+        "CREATE TABLE tickets_partitioned (LIKE tickets INCLUDING DEFAULTS) "
+        "PARTITION BY LIST (event_id)"
+    ))
+    create_event_partitions(conn, parent="tickets_partitioned")
+
+    conn.execute(text("INSERT INTO tickets_partitioned SELECT * FROM tickets"))
+    conn.execute(text("DROP TABLE tickets"))
+    conn.execute(text("ALTER TABLE tickets_partitioned RENAME TO tickets"))
+
+    conn.execute(text("ALTER TABLE tickets ADD CONSTRAINT tickets_pkey PRIMARY KEY (event_id, id)"))
+    conn.execute(text("ALTER TABLE tickets ADD CONSTRAINT tickets_qr_data_key UNIQUE (event_id, qr_data)"))
+    conn.execute(text(
+        "ALTER TABLE tickets ADD CONSTRAINT tickets_event_id_fkey "
+        "FOREIGN KEY (event_id) REFERENCES events (id)"
+    ))
+    # Lookups by id alone (QR images, deletes, QR rotation) cannot use the
+    # (event_id, id) key
+    conn.execute(text("CREATE INDEX ix_tickets_id ON tickets (id)"))
+    for index in indexes:
+        index.create(conn)
+    return True
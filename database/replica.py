@@ -0,0 +1,195 @@
+"""
+Read replica routing for the public read endpoints (GET /by-tx-ref,
+POST /check-availability), so post-payment polling and form validation
+stay off the primary that webhooks and gate check-ins write to.
+
+A read uses REPLICA_DATABASE_URL when the monitor last found it up and
+no more than REPLICA_MAX_LAG_SECONDS behind, and its tx_ref was not
+committed by this process in the last READ_YOUR_WRITES_SECONDS. Anything
+else reads the primary, as does a read that fails on the replica or
+(for order lookups) finds nothing there yet.
+
+Locally, point REPLICA_DATABASE_URL at a second SQLite file (e.g. a
+`sqlite3 app.db ".backup replica.db"` copy) or Postgres instance. Lag is
+only measured on a Postgres streaming replica; other databases count as
+current while reachable.
+"""
+import logging
+import threading
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from core.cache import TTLCache
+from core.config import (
+    REPLICA_DATABASE_URL,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_CHECK_INTERVAL,
+    READ_YOUR_WRITES_SECONDS,
+)
+from core.metrics import replica_lag_seconds, replica_up
+from database.session import (
+    SessionLocal,
+    ReplicaSessionLocal,
+    AsyncSessionLocal,
+    AsyncReplicaSessionLocal,
+    get_replica_engine,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Replica connection failures; anything else is a real error and is raised
+REPLICA_ERRORS = (OperationalError, InterfaceError)
+
+# Seconds the replica has not yet replayed; 0 when it is caught up (an idle
+# primary would otherwise look like growing lag) or not a standby at all
+PG_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+# =========================
+# Read-your-writes
+# =========================
+recent_writes = TTLCache(maxsize=10000, ttl=READ_YOUR_WRITES_SECONDS)
+
+
+def note_write(tx_ref: str):
+    """
+    Sends reads of this order to the primary for READ_YOUR_WRITES_SECONDS.
+    Call after the commit that created its tickets.
+    """
+    if REPLICA_DATABASE_URL and READ_YOUR_WRITES_SECONDS > 0:
+        recent_writes.set(tx_ref, True)
+
+
+# =========================
+# Health / lag monitor
+# =========================
+class ReplicaMonitor:
+    """
+    Background thread measuring replica lag every REPLICA_CHECK_INTERVAL
+    seconds. Until the first successful check the replica is not used.
+    """
+
+    def __init__(self, interval: float = REPLICA_CHECK_INTERVAL, max_lag: float = REPLICA_MAX_LAG_SECONDS):
+        self.interval = interval
+        self.max_lag = max_lag
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not REPLICA_DATABASE_URL or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def check(self) -> bool:
+        try:
+            with get_replica_engine().connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(conn.execute(PG_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as exc:
+            if self.healthy:
+                logger.warning("Read replica unreachable, reading from primary: %r", exc)
+            self.lag = None
+            self._set_healthy(False)
+            return False
+
+        self.lag = lag
+        replica_lag_seconds.set(lag)
+        healthy = lag <= self.max_lag
+        if self.healthy and not healthy:
+            logger.warning("Read replica %.1fs behind, reading from primary", lag)
+        self._set_healthy(healthy)
+        return healthy
+
+    def mark_down(self):
+        """
+        Stops routing to the replica until the next successful check.
+        """
+        self._set_healthy(False)
+
+    def _set_healthy(self, healthy: bool):
+        self.healthy = healthy
+        replica_up.set(1 if healthy else 0)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.check()
+            self._stopping.wait(self.interval)
+
+
+replica_monitor = ReplicaMonitor()
+
+
+def use_replica(tx_ref: Optional[str] = None) -> bool:
+    if not REPLICA_DATABASE_URL or not replica_monitor.healthy:
+        return False
+    return tx_ref is None or recent_writes.get(tx_ref) is None
+
+
+# =========================
+# Routed reads
+# =========================
+def run_read(fn: Callable[..., T], tx_ref: Optional[str] = None, retry_empty: bool = False) -> T:
+    """
+    fn(db) on the replica when use_replica(tx_ref), else on the primary.
+    Retried on the primary when the replica connection fails, or when it
+    returns an empty result and `retry_empty` (not replicated yet).
+    """
+    if use_replica(tx_ref):
+        db = ReplicaSessionLocal()
+        try:
+            result = fn(db)
+            if result or not retry_empty:
+                return result
+        except REPLICA_ERRORS as exc:
+            logger.warning("Replica read failed, retrying on primary: %r", exc)
+            replica_monitor.mark_down()
+        finally:
+            db.close()
+
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+async def run_read_async(fn: Callable[..., Awaitable[T]], tx_ref: Optional[str] = None,
+                         retry_empty: bool = False) -> T:
+    """
+    run_read for AsyncSessions (DB_ASYNC=true).
+    """
+    if use_replica(tx_ref):
+        try:
+            async with AsyncReplicaSessionLocal() as db:
+                result = await fn(db)
+            if result or not retry_empty:
+                return result
+        except REPLICA_ERRORS as exc:
+            logger.warning("Replica read failed, retrying on primary: %r", exc)
+            replica_monitor.mark_down()
+
+    async with AsyncSessionLocal() as db:
+        return await fn(db)
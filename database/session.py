@@ -1,21 +1,169 @@
-import os
+import threading
+from typing import Callable
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+from core.config import settings
+from core.metrics import instrument_engine
+
+# Engines are created on first use, not at import, so the app can start
+# (and answer /ping) without touching the database driver.
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _create_engine(url: str) -> Engine:
+    engine = create_engine(
+        url,
+        pool_pre_ping=True,     # handles Supabase idle disconnects
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+    return engine
+
+
+def _cached_engine(key: str, factory: Callable[[], Engine]):
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = factory()
+    return engine
+
+
+def get_engine() -> Engine:
+    return _cached_engine("sync", lambda: _create_engine(settings.DATABASE_URL))
+
+
+def get_replica_engine() -> Engine:
+    """
+    Engine for REPLICA_DATABASE_URL (read-only traffic, see database.replica)
+    """
+    return _cached_engine("replica", lambda: _create_engine(settings.REPLICA_DATABASE_URL))
 
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,     # handles Supabase idle disconnects
-    pool_size=5,
-    max_overflow=10,
+class _LazySessionmaker(sessionmaker):
+    """
+    sessionmaker that binds to the engine when the first session is made
+    """
+
+    def __init__(self, engine_factory: Callable[[], Engine] = get_engine, **kw):
+        super().__init__(**kw)
+        self.engine_factory = engine_factory
+
+    def __call__(self, **local_kw):
+        local_kw.setdefault("bind", self.engine_factory())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,  # objects are serialized after commit; avoid a reload per row
 )
 
-SessionLocal = sessionmaker(
+ReplicaSessionLocal = _LazySessionmaker(
+    get_replica_engine,
     autocommit=False,
     autoflush=False,
-    bind=engine
+    expire_on_commit=False,
 )
+
+
+def get_db():
+    """
+    Request-scoped session shared by all routers
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# =========================
+# Optional async engine (DB_ASYNC=true)
+# =========================
+def _async_url(url: str) -> str:
+    for prefix, driver in (
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+def _create_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine.sync_engine)
+    return engine
+
+
+def get_async_engine():
+    return _cached_engine("async", lambda: _create_async_engine(
+        settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL)
+    ))
+
+
+def get_async_replica_engine():
+    return _cached_engine("async_replica", lambda: _create_async_engine(
+        settings.ASYNC_REPLICA_DATABASE_URL or _async_url(settings.REPLICA_DATABASE_URL)
+    ))
+
+
+_async_sessionmakers = {}
+
+
+def _async_session(key: str, engine_factory):
+    maker = _async_sessionmakers.get(key)
+    if maker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        maker = _async_sessionmakers[key] = async_sessionmaker(
+            engine_factory(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return maker()
+
+
+def AsyncSessionLocal():
+    return _async_session("async", get_async_engine)
+
+
+def AsyncReplicaSessionLocal():
+    return _async_session("async_replica", get_async_replica_engine)
+
+
+async def get_async_db():
+    """
+    Request-scoped AsyncSession (only when DB_ASYNC is enabled)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def __getattr__(name: str):
+    # `from database.session import engine` keeps working; it builds the engine
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module 'database.session' has no attribute '{name}'")
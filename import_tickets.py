@@ -0,0 +1,64 @@
+"""
+Bulk-import manually sold tickets (cash / bank transfer booth sales).
+
+    python import_tickets.py FILE [--format csv|ndjson] [--chunk-size 200] [--workers 2]
+
+CSV columns: tx_ref,email,phone,full_name,gender,department,level,price
+(one row per attendee, rows of an order together). NDJSON takes the same
+fields per line, or one order per line shaped like POST /api/tickets.
+Orders whose tx_ref already exists are skipped, so re-running is safe.
+"""
+import argparse
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.config import IMPORT_WORKERS, IMPORT_CHUNK_SIZE
+from workers.ticket_import import import_orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import manually sold tickets")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None,
+                        help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="orders per transaction")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS,
+                        help="processes generating ticket ids (0 = in this process)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+    print(f"📥 Importing {args.file} as {fmt}")
+
+    def report(progress: dict):
+        print(
+            f"  orders={progress['orders']} tickets={progress['tickets']} "
+            f"existing={progress['existing']} errors={progress['errors']}"
+        )
+
+    executor = None
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    try:
+        with open(args.file, encoding="utf-8-sig", newline="") as lines:
+            result = import_orders(lines, fmt, args.chunk_size, executor, report)
+    except ValueError as exc:
+        sys.exit(f"❌ {exc}")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    for error in result["errors"]:
+        print(f"  line {error['line']} ({error['tx_ref'] or '-'}): {error['error']}")
+    print(
+        f"✅ Done: {result['orders']} orders / {result['tickets']} tickets imported, "
+        f"{result['existing']} already present, {len(result['errors'])} errors"
+    )
+    if result["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,41 @@
-from database.session import engine
+"""
+Schema management: creates missing tables, then applies migrations.
+
+    python init_db.py
+
+Run on every deploy before starting the API (the app no longer touches
+the schema at import). Safe to re-run: every step is idempotent.
+"""
+import time
+
+from database.session import get_engine
 from database.base import Base
+from database.migrations import run_migrations
 from models.ticket import Ticket
 from models.admin import Admin
+from models.webhook_event import WebhookEvent
+from models.order import Order
+from models.token_revocation import TokenRevocation
+from models.capacity import CapacityCounter, SeatHold
+from models.event import Event
+
+# create_all() only creates tables whose models have been imported
+MODELS = (Ticket, Admin, WebhookEvent, Order, TokenRevocation, CapacityCounter, SeatHold, Event)
+
+
+def migrate(verbose: bool = False):
+    engine = get_engine()
+
+    Base.metadata.create_all(bind=engine)
+    if verbose:
+        print("✅ Tables created successfully")
+
+    run_migrations(engine)
+    if verbose:
+        print("✅ Migrations applied")
+
 
-Base.metadata.create_all(bind=engine)
-print("✅ Tables created successfully")
+if __name__ == "__main__":
+    started = time.perf_counter()
+    migrate(verbose=True)
+    print(f"⏱  {time.perf_counter() - started:.2f}s")
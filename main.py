@@ -1,27 +1,76 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from api import auth, tickets, scan, webhook, events
+from core.config import WEBHOOK_WORKERS, METRICS_ENABLED, EVENT_MODE, MIGRATE_ON_STARTUP
+from core.metrics import MetricsMiddleware, render_metrics, startup_seconds
+from init_db import migrate
+from workers.webhook_inbox import inbox_workers
+from workers.scan_index import scan_index
+from database.replica import replica_monitor
+
+logger = logging.getLogger("nacos.startup")
+
+# Schema changes are not run at import: `python init_db.py` on deploy,
+# or MIGRATE_ON_STARTUP=true to run them in the lifespan below.
 
-from api import auth, tickets, scan, webhook
-from database.session import engine
-from database.base import Base
 
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
+    if MIGRATE_ON_STARTUP:
+        await asyncio.to_thread(migrate)
+    # In-process webhook inbox workers (set WEBHOOK_WORKERS=0 to run them separately)
+    if WEBHOOK_WORKERS > 0:
+        inbox_workers.start()
+    # Event night: answer scans from memory (replays a leftover journal first)
+    if EVENT_MODE:
+        scan_index.start()
+    # Lag checks for REPLICA_DATABASE_URL (no-op without a replica)
+    replica_monitor.start()
 
-app = FastAPI(title="NACOS MAPOLY Ticketing API")
+    ready = time.perf_counter()
+    startup_seconds.set(lifespan_started - _import_started, "import")
+    startup_seconds.set(ready - lifespan_started, "lifespan")
+    logger.info("Ready in %.0f ms (import %.0f ms)",
+                (ready - _import_started) * 1000, (lifespan_started - _import_started) * 1000)
+    yield
+    replica_monitor.stop()
+    scan_index.stop()
+    inbox_workers.stop()
+    tickets.pdf_executor.shutdown(wait=False, cancel_futures=True)
+    tickets.import_executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="NACOS MAPOLY Ticketing API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["https://nacosfresherspartyticket.vercel.app"],
     allow_methods=["*"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "X-Hold-Token"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Per-route latency / query metrics (outermost, so it times everything)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Routers
 app.include_router(auth.router)
 app.include_router(tickets.router)
 app.include_router(scan.router)
 app.include_router(webhook.router)
+app.include_router(events.router)
 
 # Health / Ping endpoint
 @app.get("/ping")
@@ -31,3 +80,13 @@ async def ping():
     Returns a simple status message.
     """
     return {"status": "ok", "message": "Server is alive"}
+
+
+# Prometheus scrape endpoint
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        if WEBHOOK_WORKERS == 0:
+            # Workers run in webhook_worker.py; read the shared inbox here
+            inbox_workers.record_metrics()
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
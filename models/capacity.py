@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database.base import Base
+
+
+class CapacityCounter(Base):
+    """
+    Running total of seats taken (issued tickets + live holds).
+    A single conditional UPDATE on this row decides whether seats are
+    still available, so no purchase has to COUNT(*) the tickets table.
+    """
+    __tablename__ = "capacity_counters"
+
+    name = Column(String, primary_key=True)  # event id
+    reserved = Column(Integer, nullable=False, default=0)
+
+
+class SeatHold(Base):
+    """
+    Seats held for a checkout in progress, keyed by the order tx_ref.
+    Converted into tickets by the payment webhook, or released once
+    expires_at passes.
+    """
+    __tablename__ = "seat_holds"
+
+    tx_ref = Column(String, primary_key=True)
+    # Seats come from this event's counter and go back to it
+    event_id = Column(String, ForeignKey("events.id"), nullable=False)
+    seats = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    # Returned only to the client that placed the hold; needed to release it
+    release_token = Column(String, nullable=True)
+    client_ip = Column(String, index=True, nullable=True)  # open holds are capped per client
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
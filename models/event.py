@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Numeric
+from sqlalchemy.sql import func
+from database.base import Base
+
+# Event ids double as partition names (tickets_<id>), so keep them simple
+EVENT_ID_PATTERN = r"^[a-z][a-z0-9_]{0,39}$"
+
+
+class Event(Base):
+    """
+    One party / semester event. Tickets, capacity counters and (on
+    Postgres, optionally) ticket partitions are keyed by its id.
+    """
+    __tablename__ = "events"
+
+    id = Column(String, primary_key=True)  # e.g. "freshers_2026"
+    name = Column(String, nullable=False)
+
+    price = Column(Numeric(10, 2), nullable=True)         # default ticket price for manual sales
+    capacity = Column(Integer, nullable=False, default=0)  # 0 = unlimited
+    is_open = Column(Boolean, nullable=False, default=True)  # sales open
+
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, Numeric, ForeignKey
+from sqlalchemy.sql import func
+from database.base import Base
+
+
+class Order(Base):
+    """
+    One row per paid transaction. The primary key on tx_ref (and the
+    unique provider transaction id) makes ticket creation idempotent.
+    """
+    __tablename__ = "orders"
+
+    tx_ref = Column(String, primary_key=True)
+    provider_tx_id = Column(String, unique=True, nullable=True)  # Flutterwave data.id
+    event_id = Column(String, ForeignKey("events.id"), nullable=True)  # set by migrations on old rows
+
+    email = Column(String, nullable=False)
+    phone = Column(String, nullable=False)
+    amount = Column(Numeric(10, 2), nullable=True)
+    currency = Column(String, nullable=True)
+    source = Column(String, nullable=False)  # webhook | manual | import | backfill
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
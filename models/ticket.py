@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Numeric
+from sqlalchemy import Column, String, Boolean, DateTime, Numeric, Index, ForeignKey
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from database.base import Base
 import uuid
@@ -8,6 +9,7 @@ class Ticket(Base):
     __tablename__ = "tickets"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    event_id = Column(String, ForeignKey("events.id"), nullable=False)
 
     # Shared contact info (same for all tickets in an order)
     email = Column(String, nullable=False)
@@ -20,7 +22,8 @@ class Ticket(Base):
     level = Column(String, nullable=False)
 
     # Payment linkage
-    tx_ref = Column(String, index=True, nullable=False)
+    tx_ref = Column(String, index=True, nullable=False)           # "{original_tx_ref}-{id}"
+    original_tx_ref = Column(String, index=True, nullable=True)  # order reference shared by the group
     price = Column(Numeric(10, 2), nullable=False)
     currency = Column(String, nullable=False)
     payment_status = Column(String, nullable=False)
@@ -28,9 +31,27 @@ class Ticket(Base):
     # QR & check-in
     qr_data = Column(String, unique=True, nullable=True)  # ← MUST be nullable
     is_checked_in = Column(Boolean, default=False)
+    checked_in_at = Column(DateTime(timezone=True), nullable=True)
+    checked_in_by = Column(String, nullable=True)  # gate / device id
 
     purchase_date = Column(
-        DateTime(timezone=True),
+        # On SQLite, bind values in CURRENT_TIMESTAMP's text format so
+        # keyset cursors compare correctly against server-set values
+        DateTime(timezone=True).with_variant(
+            sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d "
+                                           "%(hour)02d:%(minute)02d:%(second)02d"),
+            "sqlite",
+        ),
         server_default=func.now(),
         nullable=False
     )
+
+    # Led by event_id: every listing, stats and availability query is
+    # scoped to one event
+    __table_args__ = (
+        # Keyset pagination of the admin listing
+        Index("ix_tickets_event_purchase_date_id", "event_id", "purchase_date", "id"),
+        # Availability checks (email / phone already used for this event)
+        Index("ix_tickets_event_email", "event_id", "email"),
+        Index("ix_tickets_event_phone", "event_id", "phone"),
+    )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy.sql import func
+from database.base import Base
+
+
+class TokenRevocation(Base):
+    """
+    Revoked admin/scanner tokens (by jti) and scanner devices.
+    A device revocation blocks every token for that device issued before
+    `created_at`; new tokens can be issued afterwards.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String, index=True, nullable=True)
+    device_id = Column(String, index=True, nullable=True)
+
+    # Row can be ignored once every affected token has expired
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy.sql import func
+from database.base import Base
+
+
+class WebhookEvent(Base):
+    """
+    Durable inbox of verified provider webhooks.
+    Rows are written by the webhook endpoint and drained by workers.
+    """
+    __tablename__ = "webhook_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    provider = Column(String, nullable=False, default="flutterwave")
+    tx_ref = Column(String, index=True, nullable=True)
+
+    payload = Column(Text, nullable=False)  # raw request body
+
+    # pending -> processing -> done | ignored | failed
+    status = Column(String, index=True, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    received_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
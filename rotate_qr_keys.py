@@ -0,0 +1,44 @@
+"""
+Re-issue QR payloads under the primary key after rotating QR_SECRETS.
+
+    python rotate_qr_keys.py [--chunk-size 500] [--start-after TICKET_ID] [--pause 0.1]
+
+Safe to interrupt and re-run. This only rewrites qr_data in the
+database: attendees still hold the QR codes printed or emailed under the
+old key, and gate devices hold offline manifests built from the old
+payloads. Keep the old key in QR_SECRETS (as a non-primary entry) until
+every ticket has been re-sent to its holder and devices have pulled a
+fresh manifest; removing it earlier rejects those codes at the gate.
+"""
+import argparse
+
+from core.config import QR_PRIMARY_KEY_ID, QR_FORMAT
+from workers.qr_rotation import reissue_qr_payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-issue QR payloads under the primary key")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--start-after", default=None, help="resume after this ticket id")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    args = parser.parse_args()
+
+    print(f"🔑 Re-issuing QR payloads as {QR_FORMAT} with key {QR_PRIMARY_KEY_ID}")
+
+    def report(progress: dict):
+        print(
+            f"  scanned={progress['scanned']} rewritten={progress['rewritten']} "
+            f"rate={progress['rows_per_second']:.0f}/s last_id={progress['last_id']}"
+        )
+
+    result = reissue_qr_payloads(args.chunk_size, args.start_after, args.pause, report)
+    print(f"✅ Done: {result['rewritten']} of {result['scanned']} tickets re-issued")
+    print(
+        "⚠️  Keep the old key in QR_SECRETS until every re-issued ticket has been "
+        "re-sent to its holder and gate devices have re-downloaded the manifest. "
+        "Codes already handed out are still signed with it."
+    )
+
+
+if __name__ == "__main__":
+    main()
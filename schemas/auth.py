@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
 
 
 class AdminLoginRequest(BaseModel):
@@ -8,3 +10,20 @@ class AdminLoginRequest(BaseModel):
 class AdminLoginResponse(BaseModel):
     token: str
     session_expiry: str
+
+
+class ScannerTokenRequest(BaseModel):
+    device_id: str = Field(..., alias="deviceId", min_length=1, max_length=64)
+    expires_minutes: Optional[int] = Field(None, alias="expiresMinutes", ge=1, le=24 * 60)
+
+    class Config:
+        populate_by_name = True
+
+
+class ScannerTokenResponse(BaseModel):
+    token: str
+    device_id: str = Field(..., alias="deviceId")
+    expires_at: datetime = Field(..., alias="expiresAt")
+
+    class Config:
+        populate_by_name = True
@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from decimal import Decimal
+from datetime import datetime
+
+from models.event import EVENT_ID_PATTERN
+
+
+# -----------------------------
+# Request Schemas (ADMIN)
+# -----------------------------
+class EventCreateRequest(BaseModel):
+    id: str = Field(..., pattern=EVENT_ID_PATTERN)
+    name: str
+    price: Optional[Decimal] = None
+    capacity: int = Field(0, ge=0)  # 0 = unlimited
+    is_open: bool = True
+
+
+class EventUpdateRequest(BaseModel):
+    name: Optional[str] = None
+    price: Optional[Decimal] = None
+    capacity: Optional[int] = Field(None, ge=0)
+    is_open: Optional[bool] = None
+
+
+# -----------------------------
+# Response Schemas
+# -----------------------------
+class EventResponse(BaseModel):
+    id: str
+    name: str
+    price: Optional[Decimal] = None
+    capacity: int
+    is_open: bool
+    archived_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class CurrentEventResponse(BaseModel):
+    id: str
+    name: str
+    price: Optional[Decimal] = None
+    is_open: bool
+    seats_remaining: Optional[int] = None  # None when capacity is unlimited
+
+
+class EventArchiveResponse(BaseModel):
+    message: str
+    detached_table: Optional[str] = None  # None when tickets are not partitioned
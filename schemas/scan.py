@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
+from datetime import datetime, timezone
 
 
 class ScanRequest(BaseModel):
     qr_data: str = Field(..., alias="qrData")
+    gate_id: Optional[str] = Field(None, alias="gateId")
 
     class Config:
         populate_by_name = True
@@ -12,7 +15,73 @@ class ScanResponse(BaseModel):
     ticket_id: str = Field(..., alias="ticketId")
     full_name: str = Field(..., alias="fullName")
     checked_in: bool = Field(..., alias="checkedIn")
+    checked_in_at: Optional[datetime] = Field(None, alias="checkedInAt")
+    checked_in_by: Optional[str] = Field(None, alias="checkedInBy")
     message: str
 
     class Config:
         populate_by_name = True
+
+
+# -----------------------------
+# Offline scanning
+# -----------------------------
+class TicketManifestResponse(BaseModel):
+    version: int
+    # Unix seconds; kept as an int so the signed form is unambiguous
+    generated_at: int = Field(..., alias="generatedAt")
+    count: int
+    fields: List[str]
+    # One [ticketId, qrDigest, checkedIn] row per ticket
+    tickets: List[list]
+    signature: str
+
+    class Config:
+        populate_by_name = True
+
+
+class OfflineCheckIn(BaseModel):
+    ticket_id: str = Field(..., alias="ticketId")
+    scanned_at: datetime = Field(..., alias="scannedAt")
+
+    @field_validator("scanned_at")
+    @classmethod
+    def _as_utc(cls, value: datetime) -> datetime:
+        # Devices without a zone are taken as UTC, so one batch can mix both
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    class Config:
+        populate_by_name = True
+
+
+class CheckInSyncRequest(BaseModel):
+    device_id: str = Field(..., alias="deviceId")
+    check_ins: List[OfflineCheckIn] = Field(..., alias="checkIns", max_length=2000)
+
+    class Config:
+        populate_by_name = True
+
+
+class CheckInSyncResult(BaseModel):
+    ticket_id: str = Field(..., alias="ticketId")
+    # checked_in | already_used | duplicate | not_found
+    status: str
+    scanned_at: Optional[datetime] = Field(None, alias="scannedAt")
+
+    class Config:
+        populate_by_name = True
+
+
+class CheckInSyncResponse(BaseModel):
+    applied: int
+    results: List[CheckInSyncResult]
+
+
+class FeedTokenResponse(BaseModel):
+    token: str
+    expires_at: datetime = Field(..., alias="expiresAt")
+
+    class Config:
+        populate_by_name = True
@@ -1,9 +1,10 @@
 # schemas/ticket.py
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, computed_field
 from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
+from utils.id_generator import display_ticket_id
 
 
 # -----------------------------
@@ -29,6 +30,11 @@ class TicketAvailabilityRequest(BaseModel):
     phone: str
 
 
+class SeatHoldRequest(BaseModel):
+    tx_ref: str
+    seats: int = Field(1, ge=1)
+
+
 # -----------------------------
 # Response Schemas
 # -----------------------------
@@ -47,6 +53,33 @@ class TicketResponse(BaseModel):
     qr_data: str
     purchase_date: datetime
 
+    @computed_field
+    @property
+    def display_id(self) -> str:
+        return display_ticket_id(self.id)
+
+    class Config:
+        orm_mode = True
+
+
+class TicketSummaryResponse(BaseModel):
+    """
+    Compact projection for the admin dashboard table.
+    """
+    id: str
+    full_name: str
+    department: str
+    level: str
+    gender: str
+    payment_status: str
+    is_checked_in: Optional[bool] = None
+    purchase_date: datetime
+
+    @computed_field
+    @property
+    def display_id(self) -> str:
+        return display_ticket_id(self.id)
+
     class Config:
         orm_mode = True
 
@@ -54,3 +87,43 @@ class TicketResponse(BaseModel):
 class TicketAvailabilityResponse(BaseModel):
     available: bool
     reason: Optional[str] = None
+    seats_remaining: Optional[int] = None  # None when capacity is unlimited
+
+
+class SeatHoldResponse(BaseModel):
+    tx_ref: str
+    seats: int
+    expires_at: datetime
+    release_token: Optional[str] = None  # send as X-Hold-Token to release the hold
+    seats_remaining: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+
+class TicketGroupStats(BaseModel):
+    name: str
+    sold: int
+    checked_in: int
+
+
+class TicketStatsResponse(BaseModel):
+    sold: int
+    checked_in: int
+    revenue: Decimal
+    by_department: List[TicketGroupStats]
+    by_level: List[TicketGroupStats]
+    generated_at: datetime
+
+
+class TicketImportError(BaseModel):
+    line: int
+    tx_ref: Optional[str] = None
+    error: str
+
+
+class TicketImportResponse(BaseModel):
+    orders: int             # orders created by this import
+    tickets: int
+    existing: int           # tx_refs already imported or sold, skipped
+    errors: List[TicketImportError]
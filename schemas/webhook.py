@@ -36,3 +36,13 @@ class FlutterwaveData(BaseModel):
 class FlutterwaveWebhookPayload(BaseModel):
     event: str
     data: FlutterwaveData
+
+
+class WebhookInboxStats(BaseModel):
+    pending: int
+    processing: int
+    failed: int
+    done: int
+    sold_out: int = 0
+    oldest_pending_age_seconds: float
+    avg_processing_lag_seconds: float
@@ -1,9 +1,105 @@
-import uuid
+import os
+import re
+import threading
+import time
+from typing import List, Tuple
+
+# Ticket ids are "NACOS-" + a ULID: 48-bit millisecond timestamp then
+# 80 random bits, in Crockford base32 (26 chars, no I/L/O/U).
+# They sort by creation time, so new rows land at the right edge of the
+# primary-key index instead of random pages, and 80 random bits per
+# millisecond keep separate workers from colliding without a DB check.
+# Older ids ("NACOS-" + 8 hex chars) stay valid everywhere.
+TICKET_ID_PREFIX = "NACOS-"
+ULID_ID = re.compile(r"^NACOS-([0-7][0-9A-HJKMNP-TV-Z]{25})$")
+
+_CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# base64.b32encode/b32decode are pure Python; these go through int instead.
+# Every 10-bit value as two Crockford chars, so a ULID is 13 lookups
+_CROCKFORD_PAIRS = [a + b for a in _CROCKFORD_ALPHABET for b in _CROCKFORD_ALPHABET]
+# Crockford chars to int(..., 32) digits; anything else to "!", which int() rejects
+INT_BASE32_DIGITS = "0123456789abcdefghijklmnopqrstuv"
+_FROM_CROCKFORD = str.maketrans({
+    **{chr(c): "!" for c in range(128)},
+    **dict(zip(_CROCKFORD_ALPHABET, INT_BASE32_DIGITS)),
+})
+_RANDOM_MAX = (1 << 80) - 1
+
+# Last (millisecond, random) issued by this process; ids created in the
+# same millisecond increment the random part so they still sort in order
+_lock = threading.Lock()
+_last = [0, 0]
+
+
+def _reset_after_fork():
+    # A forked worker must not continue the parent's sequence
+    global _lock
+    _lock = threading.Lock()
+    _last[0] = _last[1] = 0
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _next_ulid() -> bytes:
+    now = time.time_ns() // 1_000_000
+    with _lock:
+        if now > _last[0]:
+            rand = int.from_bytes(os.urandom(10), "big")
+        else:
+            # Same millisecond (or the clock stepped back): keep counting up
+            now, rand = _last[0], _last[1] + 1
+            if rand > _RANDOM_MAX:
+                now, rand = now + 1, 0
+        _last[0], _last[1] = now, rand
+    return now.to_bytes(6, "big") + rand.to_bytes(10, "big")
+
+
+def ulid_to_text(raw: bytes) -> str:
+    # 128 bits as 26 chars = 130 bits, read 10 bits at a time
+    value = int.from_bytes(raw, "big")
+    return "".join([_CROCKFORD_PAIRS[(value >> shift) & 0x3FF] for shift in range(120, -1, -10)])
+
+
+def ulid_from_text(text: str) -> bytes:
+    """
+    Raises ValueError for anything that is not a 26-char ULID.
+    """
+    if len(text) != 26 or not text.isascii():
+        raise ValueError("Invalid ULID")
+    value = int(text.translate(_FROM_CROCKFORD), 32)
+    if value >> 128:
+        raise ValueError("Invalid ULID")
+    return value.to_bytes(16, "big")
+
 
 def generate_ticket_id() -> str:
     """
-    Generates a unique ticket ID like:
-    NACOS-8F3A2C9D
+    Generates a unique, time-ordered ticket ID like:
+    NACOS-01JAD4Q7X2M9V6C8KZ3R5TB0HN
+    """
+    return TICKET_ID_PREFIX + ulid_to_text(_next_ulid())
+
+
+def display_ticket_id(ticket_id: str) -> str:
+    """
+    Short form for people to read: NACOS-3R5T-B0HN (the last 8 chars,
+    random bits). Not unique on its own; the full id stays authoritative.
+    Older ids are already short and are returned unchanged.
+    """
+    match = ULID_ID.match(ticket_id)
+    if not match:
+        return ticket_id
+    tail = match.group(1)[-8:]
+    return f"{TICKET_ID_PREFIX}{tail[:4]}-{tail[4:]}"
+
+
+def issue_ticket_ids(count: int) -> List[Tuple[str, str]]:
+    """
+    `count` fresh (ticket_id, qr_data) pairs. Top-level so bulk imports
+    can run it in worker processes.
     """
-    short_id = uuid.uuid4().hex[:8].upper()
-    return f"NACOS-{short_id}"
+    from core.crypto import encrypt_qr_payload
+
+    ids = [generate_ticket_id() for _ in range(count)]
+    return [(ticket_id, encrypt_qr_payload(ticket_id)) for ticket_id in ids]
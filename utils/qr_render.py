@@ -0,0 +1,138 @@
+import io
+import zlib
+from typing import List
+
+# A6 portrait, in PDF points
+PAGE_WIDTH = 297.64
+PAGE_HEIGHT = 419.53
+QR_SIZE = 200
+QR_BORDER = 2  # quiet-zone modules
+
+
+def _make_qr(qr_data: str):
+    # Imported on first render: segno is slow to import and most
+    # processes never draw a QR code
+    import segno
+
+    # Medium error correction survives scratched screens at the gate
+    return segno.make_qr(qr_data, error="m")
+
+
+def render_qr_png(qr_data: str, scale: int) -> bytes:
+    out = io.BytesIO()
+    _make_qr(qr_data).save(out, kind="png", scale=scale, border=QR_BORDER)
+    return out.getvalue()
+
+
+def render_qr_svg(qr_data: str, scale: int) -> bytes:
+    out = io.BytesIO()
+    _make_qr(qr_data).save(out, kind="svg", scale=scale, border=QR_BORDER, xmldecl=False)
+    return out.getvalue()
+
+
+# =========================
+# Ticket PDF
+# =========================
+def _pdf_text(value: str) -> str:
+    value = value.encode("latin-1", "replace").decode("latin-1")
+    return value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text_line(text: str, size: int, y: float) -> str:
+    # Centred using Helvetica's average glyph width (~0.5 em)
+    x = max(12, (PAGE_WIDTH - len(text) * size * 0.5) / 2)
+    return f"BT /F1 {size} Tf {x:.2f} {y:.2f} Td ({_pdf_text(text)}) Tj ET\n"
+
+
+def _qr_path(qr_data: str) -> str:
+    """
+    QR modules as filled rectangles; runs of dark modules on a row
+    are merged into one rectangle to keep the stream small.
+    """
+    matrix = _make_qr(qr_data).matrix
+    modules = len(matrix) + 2 * QR_BORDER
+    unit = QR_SIZE / modules
+    left = (PAGE_WIDTH - QR_SIZE) / 2
+    top = PAGE_HEIGHT - 70
+
+    parts = ["0 g\n"]
+    for row_index, row in enumerate(matrix):
+        y = top - (row_index + QR_BORDER + 1) * unit
+        col = 0
+        while col < len(row):
+            if not row[col]:
+                col += 1
+                continue
+            start = col
+            while col < len(row) and row[col]:
+                col += 1
+            x = left + (start + QR_BORDER) * unit
+            parts.append(f"{x:.2f} {y:.2f} {(col - start) * unit:.2f} {unit:.2f} re\n")
+    parts.append("f\n")
+    return "".join(parts)
+
+
+def _ticket_page(ticket: dict) -> bytes:
+    top = PAGE_HEIGHT - 70 - QR_SIZE
+    content = (
+        _text_line("NACOS MAPOLY Freshers Party", 14, PAGE_HEIGHT - 45)
+        + _qr_path(ticket["qr_data"])
+        + _text_line(ticket["full_name"], 13, top - 28)
+        + _text_line(ticket["id"], 11, top - 48)
+        + _text_line(f"{ticket['department']}  /  {ticket['level']}", 10, top - 66)
+    )
+    return zlib.compress(content.encode("latin-1"))
+
+
+def render_tickets_pdf(tickets: List[dict]) -> bytes:
+    """
+    One A6 page per ticket: QR code, attendee name, ticket id,
+    department and level. Expects plain dicts (id, full_name,
+    department, level, qr_data) so it can run in a worker process.
+    Writes the PDF directly; only the built-in Helvetica font is used.
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for ticket in tickets:
+        stream = _ticket_page(ticket)
+        content = add(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+            + stream
+            + b"\nendstream"
+        )
+        page_ids.append(add(
+            (f"<< /Type /Page /Parent {pages} 0 R "
+             f"/MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+             f"/Resources << /Font << /F1 {font} 0 R >> >> "
+             f"/Contents {content} 0 R >>").encode()
+        ))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[pages - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages} 0 R >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, catalog, xref)
+    )
+    return out.getvalue()
@@ -0,0 +1,10 @@
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
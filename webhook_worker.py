@@ -0,0 +1,37 @@
+"""
+Standalone webhook inbox worker.
+
+    python webhook_worker.py [--workers N]
+
+Use with WEBHOOK_WORKERS=0 on the API so ticket creation runs only here.
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from core.config import WEBHOOK_POLL_INTERVAL
+from workers.webhook_inbox import WebhookWorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the webhook inbox")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    pool = WebhookWorkerPool(workers=args.workers, poll_interval=WEBHOOK_POLL_INTERVAL)
+    pool.start()
+    print(f"✅ Webhook worker running with {args.workers} thread(s)")
+
+    stop.wait()
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import update
+
+from core.crypto import encrypt_qr_payload, qr_payload_is_current
+from models.ticket import Ticket
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def reissue_qr_payloads(
+    chunk_size: int = 500,
+    start_after: Optional[str] = None,
+    pause: float = 0.0,
+    on_chunk: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Rewrites every qr_data that is not under the primary key / QR_FORMAT.
+
+    Walks tickets in primary-key order, one short transaction per chunk,
+    so only the rows of the current chunk are ever locked. Already-current
+    payloads are skipped, which makes the job safe to re-run; pass the
+    last reported `last_id` as `start_after` to resume where it stopped.
+    `pause` sleeps between chunks to leave headroom for live traffic.
+    """
+    progress = {"scanned": 0, "rewritten": 0, "last_id": start_after, "rows_per_second": 0.0}
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(Ticket.id, Ticket.qr_data).filter(Ticket.qr_data.isnot(None))
+            if progress["last_id"] is not None:
+                query = query.filter(Ticket.id > progress["last_id"])
+            rows = query.order_by(Ticket.id.asc()).limit(chunk_size).all()
+            if not rows:
+                break
+
+            changes = [
+                {"id": row.id, "qr_data": encrypt_qr_payload(row.id)}
+                for row in rows
+                if not qr_payload_is_current(row.qr_data)
+            ]
+            if changes:
+                # ORM bulk UPDATE by primary key (executemany)
+                db.execute(update(Ticket), changes)
+            db.commit()
+
+            progress["scanned"] += len(rows)
+            progress["rewritten"] += len(changes)
+            progress["last_id"] = rows[-1].id
+            progress["rows_per_second"] = progress["scanned"] / max(time.perf_counter() - started, 1e-9)
+
+            if on_chunk:
+                on_chunk(dict(progress))
+            if pause:
+                time.sleep(pause)
+    finally:
+        db.close()
+
+    logger.info("QR re-issue finished: %s", progress)
+    return progress
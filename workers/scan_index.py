@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from crud.ticket import check_in_tickets, iter_tickets, get_existing_ticket_ids, stats_cache
+from core.config import SCAN_FLUSH_INTERVAL, SCAN_FLUSH_BATCH, SCAN_JOURNAL_PATH, CURRENT_EVENT
+from models.ticket import Ticket
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+INDEX_COLUMNS = [Ticket.id, Ticket.full_name, Ticket.checked_in_at, Ticket.checked_in_by, Ticket.is_checked_in]
+
+
+class TicketRecord:
+    __slots__ = ("id", "full_name", "checked_in", "checked_in_at", "checked_in_by")
+
+    def __init__(self, ticket_id: str, full_name: str, checked_in: bool,
+                 checked_in_at: Optional[datetime], checked_in_by: Optional[str]):
+        self.id = ticket_id
+        self.full_name = full_name
+        self.checked_in = checked_in
+        self.checked_in_at = checked_in_at
+        self.checked_in_by = checked_in_by
+
+
+# =========================
+# Event mode scan index
+# =========================
+class ScanIndex:
+    """
+    Event-night cache of every ticket's check-in state.
+
+    Scans are answered from memory; check-ins are appended to a local
+    journal and written to the database in batches by background
+    threads. On start, any journal left by a previous process is
+    replayed before the index is loaded.
+
+    The journal is written and fsynced by its own thread (scans run on
+    the event loop and must not block on disk), a few milliseconds after
+    the ack. A crash or power loss can lose check-ins acknowledged in
+    that window; everything older survives.
+
+    Assumes one API process serves the scanners: separate processes
+    would each hold their own index. Conflicts the database reports
+    at flush time (ticket already checked in elsewhere) are logged, as
+    are check-ins of tickets deleted since they were indexed.
+    """
+
+    def __init__(self, journal_path: str = SCAN_JOURNAL_PATH,
+                 flush_interval: float = SCAN_FLUSH_INTERVAL, flush_batch: int = SCAN_FLUSH_BATCH):
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._records: Dict[str, TicketRecord] = {}
+        self._pending: Dict[str, Tuple[datetime, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._journal = None
+        self._journal_lock = threading.Lock()
+        self._journal_queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._journal_thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.active = False
+        self.loaded_at: Optional[float] = None
+        self.conflicts = 0
+        self.missing = 0
+
+    # ---------- lifecycle ----------
+    def start(self):
+        """
+        Reconciles a leftover journal, loads the index and starts the
+        write-behind thread. Also used to reload from the admin endpoint.
+        """
+        if self.active:
+            self.stop()
+
+        self.reconcile()
+        records = self._load()
+        with self._lock:
+            self._records = records
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self.loaded_at = time.time()
+            self.active = True
+
+        self._stopping.clear()
+        self._journal_thread = threading.Thread(
+            target=self._run_journal, name="scan-index-journal", daemon=True
+        )
+        self._journal_thread.start()
+        self._thread = threading.Thread(target=self._run, name="scan-index-flush", daemon=True)
+        self._thread.start()
+        logger.info("Event mode on: %d tickets indexed", len(records))
+
+    def stop(self):
+        """
+        Flushes outstanding check-ins and drops the index.
+        """
+        if not self.active:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+        # Drain the journal queue before the final flush trims the file
+        self._journal_queue.put(None)
+        if self._journal_thread:
+            self._journal_thread.join()
+        self.flush()
+        with self._lock:
+            self.active = False
+            self._records = {}
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def _load(self) -> Dict[str, TicketRecord]:
+        db = SessionLocal()
+        try:
+            return {
+                row.id: TicketRecord(
+                    row.id, row.full_name, bool(row.is_checked_in), row.checked_in_at, row.checked_in_by
+                )
+                for row in iter_tickets(db, INDEX_COLUMNS)
+            }
+        finally:
+            db.close()
+
+    # ---------- scans ----------
+    def check_in(self, ticket_id: str, gate_id: Optional[str],
+                 at: Optional[datetime] = None) -> Tuple[Optional[TicketRecord], bool]:
+        """
+        Returns (record, checked_in_now). record is None when the ticket
+        is not in the index (e.g. sold after loading); the caller then
+        falls back to the database.
+        """
+        at = at or datetime.now(timezone.utc)
+        with self._lock:
+            record = self._records.get(ticket_id)
+            if record is None:
+                return None, False
+            if record.checked_in:
+                return record, False
+
+            record.checked_in = True
+            record.checked_in_at = at
+            record.checked_in_by = gate_id
+            self._pending[ticket_id] = (at, gate_id)
+            pending = len(self._pending)
+
+        self._journal_queue.put(_journal_line(ticket_id, at, gate_id))
+        if pending >= self.flush_batch:
+            self._wakeup.set()
+        return record, True
+
+    def forget(self, ticket_id: str):
+        """
+        Drops a deleted ticket so it is no longer admitted from memory.
+        """
+        with self._lock:
+            self._records.pop(ticket_id, None)
+            self._pending.pop(ticket_id, None)
+
+    def remember(self, ticket_id: str, full_name: str, checked_in_at: datetime, gate_id: Optional[str]):
+        """
+        Adds a ticket checked in through the database path.
+        """
+        with self._lock:
+            if self.active:
+                self._records[ticket_id] = TicketRecord(ticket_id, full_name, True, checked_in_at, gate_id)
+
+    # ---------- write-behind ----------
+    def flush(self) -> int:
+        """
+        Writes pending check-ins with one UPDATE per gate, then trims the
+        journal to what is still pending. Returns the number written.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        try:
+            applied = self._write(batch)
+        except Exception:
+            logger.exception("Scan index flush failed; will retry")
+            with self._lock:
+                # Newer scans of the same ticket cannot exist (first scan wins)
+                self._pending = {**batch, **self._pending}
+            return 0
+
+        self._rewrite_journal()
+        return applied
+
+    def _write(self, batch: Dict[str, Tuple[datetime, Optional[str]]]) -> int:
+        by_gate: Dict[Optional[str], Dict[str, datetime]] = defaultdict(dict)
+        for ticket_id, (at, gate_id) in batch.items():
+            by_gate[gate_id][ticket_id] = at
+
+        applied = 0
+        db = SessionLocal()
+        try:
+            for gate_id, scans in by_gate.items():
+                done = check_in_tickets(db, scans, gate_id)
+                applied += len(done)
+                rejected = set(scans) - done
+                if not rejected:
+                    continue
+                conflicts = get_existing_ticket_ids(db, rejected, CURRENT_EVENT)
+                missing = rejected - conflicts
+                if conflicts:
+                    self.conflicts += len(conflicts)
+                    logger.warning("Already checked in elsewhere: %s", sorted(conflicts))
+                if missing:
+                    self.missing += len(missing)
+                    logger.warning("Admitted but no longer in the database (deleted): %s", sorted(missing))
+            db.commit()
+            if applied:
+                stats_cache.clear()
+        finally:
+            db.close()
+        return applied
+
+    def _rewrite_journal(self):
+        # Scans only wait for the copy of _pending, never for the disk.
+        # Copied after taking the journal lock, so every line already in
+        # the old file is either still pending or written to the database.
+        # A line still queued for the writer thread may end up in the new
+        # file too; replaying it is harmless.
+        with self._journal_lock:
+            if not self._journal:
+                return
+            with self._lock:
+                pending = list(self._pending.items())
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as tmp:
+                for ticket_id, (at, gate_id) in pending:
+                    tmp.write(_journal_line(ticket_id, at, gate_id))
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            self._journal.close()
+            os.replace(tmp_path, self.journal_path)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _run_journal(self):
+        """
+        Appends queued journal lines, one write + fsync per batch.
+        Stops at the None sentinel queued by stop().
+        """
+        stopping = False
+        while not stopping:
+            lines = [self._journal_queue.get()]
+            while True:
+                try:
+                    lines.append(self._journal_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in lines
+            data = "".join(line for line in lines if line is not None)
+            if not data:
+                continue
+            try:
+                with self._journal_lock:
+                    if self._journal:
+                        self._journal.write(data)
+                        self._journal.flush()
+                        os.fsync(self._journal.fileno())
+            except OSError:
+                logger.exception("Scan journal write failed")
+
+    def reconcile(self) -> int:
+        """
+        Replays a journal left behind by a crashed or killed process.
+        Check-ins are idempotent, so replaying already-written entries
+        is harmless.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        batch: Dict[str, Tuple[datetime, Optional[str]]] = {}
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                    batch.setdefault(entry["id"], (datetime.fromisoformat(entry["at"]), entry["gate"]))
+                except (ValueError, KeyError):
+                    continue  # torn last line
+
+        applied = self._write(batch) if batch else 0
+        os.remove(self.journal_path)
+        if batch:
+            logger.info("Reconciled %d journaled check-ins (%d applied)", len(batch), applied)
+        return applied
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "tickets": len(self._records),
+                "checkedIn": sum(1 for r in self._records.values() if r.checked_in),
+                "pendingWrites": len(self._pending),
+                "conflicts": self.conflicts,
+                "missing": self.missing,
+                "loadedAt": self.loaded_at,
+            }
+
+
+def _journal_line(ticket_id: str, at: datetime, gate_id: Optional[str]) -> str:
+    return json.dumps({"id": ticket_id, "at": at.isoformat(), "gate": gate_id}) + "\n"
+
+
+scan_index = ScanIndex()
@@ -0,0 +1,314 @@
+import csv
+import json
+import logging
+from concurrent.futures import Executor
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from schemas.ticket import AdminTicketCreateRequest
+from crud.ticket import insert_tickets, order_cache, stats_cache
+from crud.order import create_orders_if_new, delete_orders
+from crud.capacity import convert_seat_hold, get_hold_events
+from crud.event import get_event_settings
+from core.config import CURRENT_EVENT
+from utils.id_generator import issue_ticket_ids
+from database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# One row per attendee; consecutive rows with the same tx_ref form one order
+CSV_COLUMNS = ("tx_ref", "email", "phone", "full_name", "gender", "department", "level", "price")
+REQUIRED_COLUMNS = ("tx_ref", "email", "phone", "full_name")
+ATTENDEE_FIELDS = ("full_name", "gender", "department", "level", "price")
+
+# Tickets per task sent to the ID / QR worker processes
+ID_BATCH_SIZE = 250
+
+
+# =========================
+# Ticket rows
+# =========================
+def unpriced_attendee(payload: AdminTicketCreateRequest, event_price: Optional[Decimal]) -> Optional[int]:
+    """
+    Index of the first attendee with no price of their own when the event
+    has no price to fall back on (the order cannot be priced), else None.
+    """
+    if event_price is not None:
+        return None
+    return next((i for i, att in enumerate(payload.attendees) if att.price is None), None)
+
+
+def order_ticket_rows(payload: AdminTicketCreateRequest, issued: List[Tuple[str, str]],
+                      event_id: str = CURRENT_EVENT, event_price: Optional[Decimal] = None) -> List[dict]:
+    """
+    Ticket rows for a manually sold order, one per attendee, using the
+    (ticket_id, qr_data) pairs in `issued`. Attendees without a price
+    get the event's price; check unpriced_attendee first, as this raises
+    ValueError when neither is set.
+    """
+    if unpriced_attendee(payload, event_price) is not None:
+        raise ValueError("Attendee has no price and the event has none")
+
+    tickets_data: List[dict] = []
+    for attendee, (ticket_id, qr_data) in zip(payload.attendees, issued):
+        tickets_data.append({
+            "id": ticket_id,
+            "event_id": event_id,
+            # Mix original tx_ref with ticket ID
+            "tx_ref": f"{payload.tx_ref}-{ticket_id}",
+            "original_tx_ref": payload.tx_ref,
+            "full_name": attendee.full_name,
+            "email": payload.email,
+            "phone": payload.phone,
+            "department": attendee.department,
+            "level": attendee.level,
+            "gender": attendee.gender,
+            "price": attendee.price if attendee.price is not None else event_price,
+            "currency": "NGN",
+            "payment_status": "successful",
+            "qr_data": qr_data,
+        })
+    return tickets_data
+
+
+# =========================
+# Parsing
+# =========================
+def _records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yields (line_number, record, error) for every non-empty row.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+        for row in reader:
+            # Empty cells fall back to the schema defaults
+            record = {k: v.strip() for k, v in row.items() if k in CSV_COLUMNS and v and v.strip()}
+            if record:
+                yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"Invalid JSON: {exc}"
+            continue
+        if isinstance(record, dict):
+            yield line_number, record, None
+        else:
+            yield line_number, None, "Expected a JSON object"
+
+
+def read_orders(lines: Iterable[str], fmt: str) -> Iterator[Tuple[List[int], Optional[dict], Optional[str]]]:
+    """
+    Groups rows into orders and yields (line_numbers, order, error).
+
+    A row is either a whole order ({"tx_ref", "email", "phone",
+    "attendees": [...]}, NDJSON only) or one attendee with the order's
+    tx_ref, email and phone (CSV columns). Attendee rows of an order
+    must be adjacent. Raises ValueError when the file itself is unusable.
+    """
+    seen = set()
+    lines_of, order = [], None
+
+    def finish():
+        seen.add(order["tx_ref"])
+        return lines_of, order, None
+
+    for line_number, record, error in _records(lines, fmt):
+        if error:
+            yield [line_number], None, error
+            continue
+
+        tx_ref = record.get("tx_ref")
+        if order is not None and tx_ref == order["tx_ref"] and "attendees" not in record:
+            order["attendees"].append({k: v for k, v in record.items() if k in ATTENDEE_FIELDS})
+            lines_of.append(line_number)
+            continue
+
+        if order is not None:
+            yield finish()
+            lines_of, order = [], None
+
+        if not tx_ref:
+            yield [line_number], None, "tx_ref is required"
+            continue
+        if tx_ref in seen:
+            yield [line_number], None, "tx_ref appears earlier in the file; keep an order's rows together"
+            continue
+
+        lines_of = [line_number]
+        if "attendees" in record:
+            order = record
+            yield finish()
+            lines_of, order = [], None
+        else:
+            order = {
+                "tx_ref": tx_ref,
+                "email": record.get("email"),
+                "phone": record.get("phone"),
+                "attendees": [{k: v for k, v in record.items() if k in ATTENDEE_FIELDS}],
+            }
+
+    if order is not None:
+        yield finish()
+
+
+def validate_order(lines_of: List[int], order: dict) -> Tuple[Optional[AdminTicketCreateRequest], List[dict]]:
+    """
+    Validates with the manual-sale schemas. Attendee errors are reported
+    on the attendee's own row when the order came from one row per attendee.
+    """
+    try:
+        payload = AdminTicketCreateRequest.model_validate(order)
+    except ValidationError as exc:
+        errors = []
+        for error in exc.errors():
+            loc = error["loc"]
+            line = lines_of[0]
+            if len(lines_of) > 1 and len(loc) > 1 and loc[0] == "attendees" and isinstance(loc[1], int):
+                line = lines_of[min(loc[1], len(lines_of) - 1)]
+            field = ".".join(str(part) for part in loc)
+            errors.append({"line": line, "tx_ref": order.get("tx_ref"), "error": f"{field}: {error['msg']}"})
+        return None, errors
+
+    if not payload.attendees:
+        return None, [{"line": lines_of[0], "tx_ref": payload.tx_ref, "error": "Order has no attendees"}]
+    return payload, []
+
+
+# =========================
+# Import
+# =========================
+def _issue(count: int, executor: Optional[Executor]) -> List[Tuple[str, str]]:
+    if executor is None or count <= ID_BATCH_SIZE:
+        return issue_ticket_ids(count)
+    sizes = [min(ID_BATCH_SIZE, count - start) for start in range(0, count, ID_BATCH_SIZE)]
+    return [pair for batch in executor.map(issue_ticket_ids, sizes) for pair in batch]
+
+
+def _import_chunk(chunk: List[Tuple[List[int], AdminTicketCreateRequest]],
+                  executor: Optional[Executor], report: dict):
+    """
+    One transaction: order rows (ON CONFLICT DO NOTHING), seat capacity,
+    then every ticket of the new orders in batched INSERTs.
+    """
+    db = SessionLocal()
+    try:
+        hold_events = get_hold_events(db, [payload.tx_ref for _, payload in chunk])
+        event_of = {payload.tx_ref: hold_events.get(payload.tx_ref, CURRENT_EVENT) for _, payload in chunk}
+
+        priced = []
+        for lines_of, payload in chunk:
+            event = get_event_settings(db, event_of[payload.tx_ref])
+            index = unpriced_attendee(payload, event.price if event else None)
+            if index is None:
+                priced.append((lines_of, payload))
+            else:
+                report["errors"].append({"line": lines_of[min(index, len(lines_of) - 1)], "tx_ref": payload.tx_ref,
+                                         "error": "price is required: the event has no ticket price"})
+        chunk = priced
+
+        created = create_orders_if_new(db, [
+            {
+                "tx_ref": payload.tx_ref,
+                "event_id": event_of[payload.tx_ref],
+                "email": payload.email,
+                "phone": payload.phone,
+                "currency": "NGN",
+                "source": "import",
+            }
+            for _, payload in chunk
+        ])
+
+        accepted, sold_out = [], []
+        for lines_of, payload in chunk:
+            if payload.tx_ref not in created:
+                report["existing"] += 1
+            elif convert_seat_hold(db, payload.tx_ref, len(payload.attendees), event_of[payload.tx_ref],
+                                   require_open=False):
+                accepted.append(payload)
+            else:
+                sold_out.append(payload.tx_ref)
+                report["errors"].append({"line": lines_of[0], "tx_ref": payload.tx_ref,
+                                         "error": "Not enough seats left"})
+        delete_orders(db, sold_out)
+
+        issued = iter(_issue(sum(len(p.attendees) for p in accepted), executor))
+        tickets_data: List[dict] = []
+        for payload in accepted:
+            event_id = event_of[payload.tx_ref]
+            event = get_event_settings(db, event_id)
+            tickets_data.extend(order_ticket_rows(
+                payload, [next(issued) for _ in payload.attendees], event_id,
+                event.price if event else None,
+            ))
+
+        insert_tickets(db, tickets_data)
+        db.commit()
+        stats_cache.clear()
+        for payload in accepted:
+            order_cache.invalidate(payload.tx_ref)
+        report["orders"] += len(accepted)
+        report["tickets"] += len(tickets_data)
+    except Exception:
+        db.rollback()
+        logger.exception("Ticket import chunk failed")
+        report["errors"].extend(
+            {"line": lines_of[0], "tx_ref": payload.tx_ref, "error": "Not imported: database error"}
+            for lines_of, payload in chunk
+        )
+    finally:
+        db.close()
+
+
+def import_orders(
+    lines: Iterable[str],
+    fmt: str,
+    chunk_size: int = 200,
+    executor: Optional[Executor] = None,
+    on_chunk: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Imports a CSV or NDJSON file of manually sold orders (see read_orders).
+
+    Rows are validated as they are read and committed `chunk_size` orders
+    at a time, so memory stays flat for large files. Ticket IDs and QR
+    payloads are generated in `executor` (a process pool) when given.
+    Orders whose tx_ref already exists are skipped, which makes
+    re-running the same file safe. Returns counts plus per-row errors.
+    """
+    report = {"orders": 0, "tickets": 0, "existing": 0, "errors": []}
+    chunk: List[Tuple[List[int], AdminTicketCreateRequest]] = []
+
+    def flush():
+        _import_chunk(chunk, executor, report)
+        chunk.clear()
+        if on_chunk:
+            on_chunk({**report, "errors": len(report["errors"])})
+
+    for lines_of, order, error in read_orders(lines, fmt):
+        if error:
+            report["errors"].append({"line": lines_of[0], "tx_ref": None, "error": error})
+            continue
+        payload, errors = validate_order(lines_of, order)
+        if errors:
+            report["errors"].extend(errors)
+            continue
+        chunk.append((lines_of, payload))
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    logger.info("Ticket import finished: %d orders, %d tickets, %d existing, %d errors",
+                report["orders"], report["tickets"], report["existing"], len(report["errors"]))
+    return report
@@ -0,0 +1,260 @@
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import List
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from schemas.webhook import FlutterwaveWebhookPayload, FlutterwaveData, AttendeeMeta
+from crud.ticket import create_tickets_bulk, order_cache, stats_cache
+from crud.order import create_order_if_new, delete_orders
+from crud.capacity import convert_seat_hold, get_hold_events
+from crud.webhook_event import (
+    DONE,
+    IGNORED,
+    SOLD_OUT,
+    FAILED,
+    claim_webhook_events,
+    complete_webhook_event,
+    fail_webhook_event,
+    get_webhook_inbox_stats,
+)
+from core.config import (
+    WEBHOOK_WORKERS,
+    WEBHOOK_POLL_INTERVAL,
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_CLAIM_TIMEOUT,
+    WEBHOOK_METRICS_INTERVAL,
+    METRICS_ENABLED,
+    CURRENT_EVENT,
+)
+from core.crypto import encrypt_qr_payload
+from core.metrics import webhook_inbox_depth, webhook_inbox_lag_seconds
+from models.ticket import Ticket
+from utils.id_generator import generate_ticket_id
+from database.session import SessionLocal
+from database.replica import note_write
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# Ticket issuing
+# =========================
+def payment_attendees(data: FlutterwaveData) -> List[AttendeeMeta]:
+    attendees = data.meta.attendees if data.meta and data.meta.attendees else []
+
+    # Fallback: create one ticket if no attendees sent
+    if not attendees:
+        attendees = [AttendeeMeta(full_name=data.customer.name, gender="N/A",
+                                  department="NACOS", level="N/A")]
+    return attendees
+
+
+def issue_tickets_for_payment(db: Session, data: FlutterwaveData,
+                              event_id: str = CURRENT_EVENT) -> List[Ticket]:
+    """
+    Creates one ticket per attendee of a successful payment.
+    Caller commits.
+    """
+    attendees = payment_attendees(data)
+
+    # Price per attendee
+    total_amount = Decimal(data.amount)
+    amount_per_attendee = total_amount / len(attendees)
+
+    tickets_data = []
+    for attendee in attendees:
+        ticket_id = generate_ticket_id()
+        qr_data = encrypt_qr_payload(ticket_id)
+
+        price = Decimal(attendee.price) if attendee.price else amount_per_attendee
+
+        # Make tx_ref unique per ticket
+        unique_tx_ref = f"{data.tx_ref}-{ticket_id}"
+
+        tickets_data.append({
+            "id": ticket_id,
+            "event_id": event_id,
+            "tx_ref": unique_tx_ref,
+            "original_tx_ref": data.tx_ref,
+            "full_name": attendee.full_name,
+            "email": data.customer.email,
+            "phone": data.customer.phone_number or "",
+            "department": attendee.department or "N/A",
+            "level": attendee.level or "N/A",
+            "gender": attendee.gender or "N/A",
+            "price": price,
+            "currency": data.currency,
+            "payment_status": data.status,
+            "qr_data": qr_data,
+        })
+
+    # Insert all tickets in one statement
+    return create_tickets_bulk(db, tickets_data)
+
+
+def process_webhook_event(db: Session, event_id: int, raw_payload: str) -> str:
+    """
+    Handles one inbox event. Idempotent: the order row is inserted with
+    ON CONFLICT DO NOTHING, so a replayed payment is marked done without
+    creating tickets. Order, tickets and event status commit together.
+    """
+    try:
+        payload = FlutterwaveWebhookPayload.model_validate_json(raw_payload)
+    except ValidationError:
+        complete_webhook_event(db, event_id, FAILED)
+        db.commit()
+        return FAILED
+
+    data = payload.data
+
+    if str(data.status).lower() != "successful":
+        status = IGNORED
+    else:
+        # Tickets belong to the event the checkout held seats in
+        ticket_event = get_hold_events(db, [data.tx_ref]).get(data.tx_ref, CURRENT_EVENT)
+        created = create_order_if_new(db, {
+            "tx_ref": data.tx_ref,
+            "event_id": ticket_event,
+            "provider_tx_id": str(data.id),
+            "email": data.customer.email,
+            "phone": data.customer.phone_number or "",
+            "amount": Decimal(data.amount),
+            "currency": data.currency,
+            "source": "webhook",
+        })
+        status = DONE
+        if created:
+            # Converts the checkout's seat hold; refuses to oversell
+            if convert_seat_hold(db, data.tx_ref, len(payment_attendees(data)), ticket_event):
+                issue_tickets_for_payment(db, data, ticket_event)
+            else:
+                # The event row (status sold_out) records the refund; dropping
+                # the order lets an admin issue tickets later via POST /api/tickets
+                delete_orders(db, [data.tx_ref])
+                logger.warning("Sold out: payment %s needs a refund", data.tx_ref)
+                status = SOLD_OUT
+
+    complete_webhook_event(db, event_id, status)
+    db.commit()
+    if status == DONE:
+        stats_cache.clear()
+        # The frontend polls GET /by-tx-ref right after payment
+        order_cache.invalidate(data.tx_ref)
+        note_write(data.tx_ref)
+    return status
+
+
+def drain_inbox(batch_size: int = 20) -> int:
+    """
+    Processes claimable events until the inbox is empty.
+    Returns the number of events handled.
+    """
+    handled = 0
+    db = SessionLocal()
+    try:
+        while True:
+            events = claim_webhook_events(db, batch_size, WEBHOOK_CLAIM_TIMEOUT)
+            if not events:
+                return handled
+
+            for event in events:
+                try:
+                    process_webhook_event(db, event.id, event.payload)
+                except Exception as exc:
+                    db.rollback()
+                    logger.exception("Webhook event %s failed", event.id)
+                    fail_webhook_event(db, event.id, repr(exc), WEBHOOK_MAX_ATTEMPTS)
+                handled += 1
+    finally:
+        db.close()
+
+
+def record_inbox_metrics() -> dict:
+    """
+    Sets the webhook_inbox_* gauges served on GET /metrics.
+    """
+    db = SessionLocal()
+    try:
+        stats = get_webhook_inbox_stats(db)
+    finally:
+        db.close()
+    for status in ("pending", "processing", "failed", "sold_out"):
+        webhook_inbox_depth.set(stats[status], status)
+    webhook_inbox_lag_seconds.set(stats["oldest_pending_age_seconds"], "oldest_pending")
+    webhook_inbox_lag_seconds.set(stats["avg_processing_lag_seconds"], "processing")
+    return stats
+
+
+# =========================
+# Worker pool
+# =========================
+class WebhookWorkerPool:
+    """
+    Background threads that drain the webhook inbox.
+    Runs in-process (started from main.py) or standalone via webhook_worker.py.
+    """
+
+    def __init__(self, workers: int = WEBHOOK_WORKERS, poll_interval: float = WEBHOOK_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._next_metrics = 0.0
+
+    def start(self):
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"webhook-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """
+        Wakes idle workers right after a new event is stored.
+        """
+        self._wakeup.set()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                handled = drain_inbox()
+            except Exception:
+                logger.exception("Webhook worker loop failed")
+                handled = 0
+
+            self.record_metrics()
+            if not handled:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def record_metrics(self):
+        """
+        record_inbox_metrics at most once per WEBHOOK_METRICS_INTERVAL.
+        Called by the pool's threads, and by GET /metrics when the
+        workers run in a separate process.
+        """
+        now = time.monotonic()
+        if not METRICS_ENABLED or now < self._next_metrics:
+            return
+        self._next_metrics = now + WEBHOOK_METRICS_INTERVAL
+        try:
+            record_inbox_metrics()
+        except Exception:
+            logger.exception("Webhook inbox metrics update failed")
+
+
+inbox_workers = WebhookWorkerPool()